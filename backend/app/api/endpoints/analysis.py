@@ -11,14 +11,17 @@ from app.models.schemas import (
     BiasType
 )
 from app.services.document_service import document_service
+from app.services.text_cache import text_cache
 from app.services.ollama_service import ollama_service
-from app.services.chroma_service import chroma_service
+from app.services.vector_store import vector_service
 from app.services.rag_service import rag_service
 from app.services.database_service import database_service
+from app.services.inference_scheduler import Priority, OllamaOverloadedError, inference_priority
 from app.core.config import settings
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
+import hashlib
 
 router = APIRouter()
 
@@ -28,12 +31,14 @@ class RAGAnalysisRequest(BaseModel):
     document_id: str
     bias_types: Optional[List[BiasType]] = None
     use_rag: bool = Field(default=True, description="Enable RAG for contextual analysis")
+    force: bool = Field(default=False, description="Bypass the analysis cache and re-run the analysis")
 
 
 class RAGAnalysisResult(BiasAnalysisResult):
     """Extended analysis result with RAG metadata"""
     rag_metadata: Optional[dict] = None
     comparative_insights: Optional[str] = None
+    cache_metadata: Optional[dict] = None
 
 
 class AnalysisHistoryResponse(BaseModel):
@@ -43,6 +48,39 @@ class AnalysisHistoryResponse(BaseModel):
     total_count: int
 
 
+async def build_analysis_cache_key(
+    text: str,
+    bias_types: Optional[List[str]],
+    use_rag: bool
+) -> str:
+    """
+    Build the analysis cache key from document content and request parameters.
+
+    With RAG on, the vector table version is part of the key because the
+    retrieved reference context changes whenever the table is written.
+    The chunking settings are too: they decide how the document is split
+    for map-reduce analysis.
+    """
+    parts = [
+        hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        ",".join(sorted(bias_types)) if bias_types else "all",
+        settings.OLLAMA_MODEL,
+        ollama_service.ANALYSIS_PROMPT_VERSION,
+        (
+            f"chunked:{settings.ANALYSIS_CHUNK_SIZE}:{settings.ANALYSIS_CHUNK_OVERLAP}"
+            if settings.ANALYSIS_CHUNKED_ENABLED else "chunked:off"
+        ),
+        f"rag:{await vector_service.get_table_version()}" if use_rag else "rag:off"
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+async def _stored_content_hash(document_id: str) -> Optional[str]:
+    """SHA-256 recorded at upload, so the text cache need not re-hash the file"""
+    document = await database_service.get_document(document_id)
+    return document.get("content_hash") if document else None
+
+
 async def process_embeddings(
     document_id: str,
     file_path: Path,
@@ -50,31 +88,56 @@ async def process_embeddings(
 ):
     """
     Background task to process and store document embeddings in ChromaDB
-    Uses Ollama for local embedding generation
+    Uses Ollama for local embedding generation, at bulk priority
     """
-    try:
-        # Extract text from document
-        text = await document_service.extract_text(str(file_path), file_type)
+    with inference_priority(Priority.BULK):
+        await _process_embeddings(document_id, file_path, file_type)
 
-        # Chunk the text
-        chunks = document_service.chunk_text(text)
 
-        # Generate embeddings for all chunks using Ollama
+async def _process_embeddings(
+    document_id: str,
+    file_path: Path,
+    file_type: str
+):
+    """Extract, chunk, embed and store one document"""
+    try:
+        # Extract text from document (parsed once, then served from the text cache)
+        text = await text_cache.get_text(
+            document_id, str(file_path), file_type, await _stored_content_hash(document_id)
+        )
+
+        # Chunk the text (sentence-aware, token budget, with document offsets)
+        text_chunks = list(document_service.iter_chunks(
+            text,
+            settings.EMBEDDING_CHUNK_TOKENS,
+            settings.EMBEDDING_CHUNK_OVERLAP_TOKENS
+        ))
+        chunks = [chunk.text for chunk in text_chunks]
+        chunk_offsets = [(chunk.start, chunk.end) for chunk in text_chunks]
+
+        # Skip re-indexing when the stored chunks are already identical
+        stored = await vector_service.get_document_chunks(document_id)
+        stored_chunks = [
+            (chunk["metadata"]["text"], (chunk["metadata"].get("start_offset"), chunk["metadata"].get("end_offset")))
+            for chunk in stored
+        ]
+        if stored_chunks == list(zip(chunks, chunk_offsets)):
+            print(f"Embeddings for document {document_id} are up to date")
+            return
+
+        # Generate embeddings for all chunks using Ollama (batched /api/embed)
         embeddings = []
-        for chunk in chunks:
-            try:
-                embedding = await ollama_service.generate_embedding(chunk)
-                if embedding:
-                    embeddings.append(embedding)
-                else:
-                    print(f"Warning: Empty embedding for chunk")
-            except Exception as e:
-                print(f"Error generating embedding: {e}")
-                continue
+        try:
+            embeddings = await ollama_service.generate_embeddings(chunks)
+            if any(not embedding for embedding in embeddings):
+                print(f"Warning: Empty embedding for chunk")
+                embeddings = [embedding for embedding in embeddings if embedding]
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
 
         if embeddings and len(embeddings) == len(chunks):
             # Store in ChromaDB
-            await chroma_service.upsert_document(
+            await vector_service.upsert_document(
                 document_id=document_id,
                 text_chunks=chunks,
                 embeddings=embeddings,
@@ -82,7 +145,8 @@ async def process_embeddings(
                     "filename": file_path.name,
                     "file_type": file_type,
                     "uploaded_at": datetime.utcnow().isoformat()
-                }
+                },
+                chunk_offsets=chunk_offsets
             )
             print(f"Successfully stored {len(chunks)} chunks for document {document_id}")
         else:
@@ -107,9 +171,12 @@ async def analyze_document(
 
     The analysis is saved to MongoDB for history tracking.
     """
+    # Deduplicated re-uploads share the original's file, text, embeddings and analyses
+    document_id = await database_service.resolve_document_id(request.document_id)
+
     # Find the document file
     upload_dir = Path(settings.UPLOAD_DIR)
-    matching_files = list(upload_dir.glob(f"{request.document_id}.*"))
+    matching_files = list(upload_dir.glob(f"{document_id}.*"))
 
     if not matching_files:
         raise HTTPException(
@@ -121,8 +188,10 @@ async def analyze_document(
     file_type = file_path.suffix[1:]
 
     try:
-        # Extract text from document
-        text = await document_service.extract_text(str(file_path), file_type)
+        # Extract text from document (parsed once, then served from the text cache)
+        text = await text_cache.get_text(
+            document_id, str(file_path), file_type, await _stored_content_hash(document_id)
+        )
 
         if not text:
             raise HTTPException(
@@ -132,19 +201,43 @@ async def analyze_document(
 
         # Use RAG-enhanced analysis if enabled
         use_rag = request.use_rag and settings.RAG_ENABLED
+        bias_types_requested = [bt.value for bt in request.bias_types] if request.bias_types else None
+
+        # Serve unchanged documents from the analysis cache
+        cache_key = await build_analysis_cache_key(text, bias_types_requested, use_rag)
+        cached = None if request.force else await database_service.get_cached_analysis(cache_key)
+
+        if cached:
+            # The vectors may be gone (table reset, backend switch, alias promotion):
+            # re-index in the background - a no-op when the stored chunks match
+            background_tasks.add_task(process_embeddings, document_id, file_path, file_type)
+            return RAGAnalysisResult(
+                document_id=request.document_id,
+                overall_score=float(cached.get("overall_score", 0.0)),
+                bias_instances=[BiasInstance(**bi) for bi in cached.get("bias_instances", [])],
+                summary=cached.get("summary", "Analysis complete"),
+                analyzed_at=cached.get("analyzed_at", datetime.utcnow()),
+                rag_metadata=cached.get("rag_metadata"),
+                comparative_insights=cached.get("comparative_insights"),
+                cache_metadata={
+                    "cache_hit": True,
+                    "cache_key": cache_key,
+                    "cached_at": cached["cached_at"].isoformat() if hasattr(cached.get("cached_at"), "isoformat") else None
+                }
+            )
 
         if use_rag:
             analysis_result = await rag_service.analyze_with_rag(
                 text=text,
-                document_id=request.document_id,
+                document_id=document_id,
                 bias_types=request.bias_types,
                 use_context=True
             )
         else:
             # Standard analysis without RAG context
-            analysis_result = await ollama_service.analyze_bias(
+            analysis_result = await ollama_service.analyze_document(
                 text,
-                [bt.value for bt in request.bias_types] if request.bias_types else None
+                bias_types_requested
             )
             analysis_result["rag_metadata"] = {"context_used": False, "num_reference_chunks": 0, "reference_documents": []}
 
@@ -181,12 +274,13 @@ async def analyze_document(
             summary=analysis_result.get("summary", "Analysis complete"),
             analyzed_at=analyzed_at,
             rag_metadata=analysis_result.get("rag_metadata"),
-            comparative_insights=analysis_result.get("comparative_insights")
+            comparative_insights=analysis_result.get("comparative_insights"),
+            cache_metadata={"cache_hit": False, "cache_key": cache_key}
         )
 
         # Save analysis to database
         analysis_data = {
-            "document_id": request.document_id,
+            "document_id": document_id,
             "filename": file_path.name,
             "overall_score": result.overall_score,
             "bias_instances": [bi.model_dump() for bi in bias_instances],
@@ -194,21 +288,30 @@ async def analyze_document(
             "analyzed_at": analyzed_at,
             "rag_metadata": result.rag_metadata,
             "comparative_insights": result.comparative_insights,
-            "bias_types_requested": [bt.value for bt in request.bias_types] if request.bias_types else None
+            "bias_types_requested": bias_types_requested,
+            "cache_key": cache_key
         }
         await database_service.save_analysis(analysis_data)
+        await database_service.save_cached_analysis(cache_key, {
+            "overall_score": result.overall_score,
+            "bias_instances": analysis_data["bias_instances"],
+            "summary": result.summary,
+            "analyzed_at": analyzed_at,
+            "rag_metadata": result.rag_metadata,
+            "comparative_insights": result.comparative_insights
+        })
 
         # Process and store embeddings in background
         background_tasks.add_task(
             process_embeddings,
-            request.document_id,
+            document_id,
             file_path,
             file_type
         )
 
         return result
 
-    except HTTPException:
+    except (HTTPException, OllamaOverloadedError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -225,7 +328,7 @@ async def get_analysis_history(
     """Get the analysis history for a specific document"""
     try:
         analyses = await database_service.get_analyses_for_document(
-            document_id=document_id,
+            document_id=await database_service.resolve_document_id(document_id),
             limit=limit
         )
 
@@ -252,7 +355,9 @@ async def get_analysis_history(
 async def get_latest_analysis(document_id: str):
     """Get the most recent analysis for a document"""
     try:
-        analysis = await database_service.get_latest_analysis(document_id)
+        analysis = await database_service.get_latest_analysis(
+            await database_service.resolve_document_id(document_id)
+        )
 
         if not analysis:
             raise HTTPException(
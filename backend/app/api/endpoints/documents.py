@@ -1,48 +1,83 @@
 """
 Document upload and management endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, Request, status, Query
 from fastapi.responses import JSONResponse
 from app.models.schemas import DocumentUploadResponse, DocumentMetadata
-from app.services.document_service import document_service
-from app.services.chroma_service import chroma_service
+from app.services.document_service import (
+    document_service,
+    MalformedUploadError,
+    MultipartFileReader,
+    UploadTooLargeError
+)
+from app.services.vector_store import vector_service
+from app.services.text_cache import text_cache
 from app.services.database_service import database_service
 from app.core.config import settings
 from pathlib import Path
-import aiofiles
 from datetime import datetime
 from typing import List
 
 router = APIRouter()
 
 
-@router.post("/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_201_CREATED)
-async def upload_document(file: UploadFile = File(...)):
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 16 * 1024
+
+# The body is parsed by hand (see upload_document), so describe it for the docs
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"]
+            }
+        }
+    }
+}
+
+
+@router.post(
+    "/upload",
+    response_model=DocumentUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY}
+)
+async def upload_document(request: Request):
     """
     Upload a document for bias analysis
 
-    Accepts PDF, TXT, and DOCX files up to 10MB.
+    Accepts PDF, TXT, and DOCX files up to 10MB, as the `file` field of a
+    multipart form. The body is parsed as it arrives and the file streamed
+    to disk: an oversized upload is refused from its Content-Length, or as
+    soon as the limit is crossed, without being buffered first.
     The document will be stored locally and metadata saved to MongoDB.
     """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD:
+        raise too_large
+
+    try:
+        file = MultipartFileReader(request.headers.get("content-type", ""), request.stream())
+        filename = await file.start()
+    except MalformedUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     # Validate file extension
-    file_extension = file.filename.split(".")[-1].lower()
+    file_extension = filename.split(".")[-1].lower()
     if file_extension not in settings.ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type not allowed. Accepted types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
 
-    # Read file content to check size
-    content = await file.read()
-    file_size = len(content)
-
-    if file_size > settings.MAX_UPLOAD_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
-        )
-
-    # Generate document ID and save file
+    # Generate document ID and stream the file to disk
     document_id = document_service.generate_document_id()
     upload_dir = Path(settings.UPLOAD_DIR)
     upload_dir.mkdir(parents=True, exist_ok=True)
@@ -50,8 +85,13 @@ async def upload_document(file: UploadFile = File(...)):
     file_path = upload_dir / f"{document_id}.{file_extension}"
 
     try:
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
+        file_size, content_hash = await document_service.save_upload(
+            file, file_path, settings.MAX_UPLOAD_SIZE, settings.UPLOAD_CHUNK_SIZE
+        )
+    except UploadTooLargeError:
+        raise too_large
+    except MalformedUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -60,22 +100,30 @@ async def upload_document(file: UploadFile = File(...)):
 
     uploaded_at = datetime.utcnow()
 
-    # Save document metadata to database
-    await database_service.save_document({
+    # Save document metadata to database (re-uploads become aliases)
+    original_id = await database_service.save_document({
         "document_id": document_id,
-        "filename": file.filename,
+        "filename": filename,
         "file_size": file_size,
         "file_type": file_extension,
+        "content_hash": content_hash,
         "uploaded_at": uploaded_at,
         "analyzed": False
     })
 
+    duplicate_of = original_id if original_id and original_id != document_id else None
+    if duplicate_of:
+        # The original's file holds the same bytes
+        file_path.unlink(missing_ok=True)
+
     return DocumentUploadResponse(
         document_id=document_id,
-        filename=file.filename,
+        filename=filename,
         file_size=file_size,
         file_type=file_extension,
-        uploaded_at=uploaded_at
+        uploaded_at=uploaded_at,
+        deduplicated=duplicate_of is not None,
+        duplicate_of=duplicate_of
     )
 
 
@@ -122,14 +170,18 @@ async def get_document_metadata(document_id: str):
     db_doc = await database_service.get_document(document_id)
 
     if db_doc:
+        # Aliases report the analysis state of the document they share
+        original = await database_service.get_document(db_doc["alias_of"]) if db_doc.get("alias_of") else db_doc
+        original = original or db_doc
         return DocumentMetadata(
             document_id=document_id,
             filename=db_doc.get("filename", "unknown"),
             file_type=db_doc.get("file_type", "unknown"),
             file_size=db_doc.get("file_size", 0),
             uploaded_at=db_doc.get("uploaded_at", datetime.utcnow()),
-            analyzed=db_doc.get("analyzed", False),
-            analysis_id=db_doc.get("last_analysis_id")
+            analyzed=original.get("analyzed", False),
+            analysis_id=original.get("last_analysis_id"),
+            duplicate_of=db_doc.get("alias_of")
         )
 
     # Fallback to file system
@@ -155,6 +207,23 @@ async def get_document_metadata(document_id: str):
     )
 
 
+async def _move_embeddings(document_id: str, successor_id: str, filename: str):
+    """Re-key a document's stored chunks and vectors to the alias taking it over"""
+    chunks = await vector_service.get_document_chunks(document_id, include_vector=True)
+    if not chunks:
+        return
+    await vector_service.upsert_document(
+        document_id=successor_id,
+        text_chunks=[chunk["metadata"]["text"] for chunk in chunks],
+        embeddings=[chunk["vector"] for chunk in chunks],
+        metadata={"filename": filename},
+        chunk_offsets=[
+            (chunk["metadata"].get("start_offset"), chunk["metadata"].get("end_offset"))
+            for chunk in chunks
+        ]
+    )
+
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(document_id: str):
     """
@@ -164,7 +233,20 @@ async def delete_document(document_id: str):
     1. Delete the file from local storage
     2. Delete document metadata and analyses from MongoDB
     3. Delete embeddings from Pinecone vector database
+
+    Deleting an alias (deduplicated re-upload) only removes its metadata.
+    Deleting a document that has aliases hands its file, analyses and
+    embeddings over to the oldest alias instead.
     """
+    db_doc = await database_service.get_document(document_id)
+    if db_doc and db_doc.get("alias_of"):
+        if not await database_service.delete_document(document_id):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error deleting document: database deletion failed"
+            )
+        return None
+
     upload_dir = Path(settings.UPLOAD_DIR)
 
     # Find the file
@@ -177,11 +259,16 @@ async def delete_document(document_id: str):
         )
 
     errors = []
+    successor_id = await database_service.promote_alias(document_id)
 
-    # 1. Delete files from local storage
+    # 1. Delete files from local storage (or hand them to the promoted alias)
     try:
         for file_path in matching_files:
-            file_path.unlink()
+            if successor_id:
+                file_path.rename(file_path.with_name(f"{successor_id}{file_path.suffix}"))
+            else:
+                file_path.unlink()
+        await text_cache.delete(document_id)
     except Exception as e:
         errors.append(f"File deletion error: {str(e)}")
 
@@ -191,9 +278,13 @@ async def delete_document(document_id: str):
     except Exception as e:
         errors.append(f"Database deletion error: {str(e)}")
 
-    # 3. Delete embeddings from Pinecone
+    # 3. Delete embeddings from Pinecone (after moving them to the promoted alias)
     try:
-        await chroma_service.delete_document(document_id)
+        if successor_id:
+            await _move_embeddings(
+                document_id, successor_id, f"{successor_id}{matching_files[0].suffix}"
+            )
+        await vector_service.delete_document(document_id)
     except Exception as e:
         errors.append(f"Pinecone deletion error: {str(e)}")
 
@@ -1,11 +1,14 @@
 """
 RAG (Retrieval Augmented Generation) endpoints for contextual bias analysis
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import AsyncIterator, List, Optional, Dict
+import json
 from app.services.rag_service import rag_service
 from app.services.database_service import database_service
+from app.services.inference_scheduler import OllamaOverloadedError
 from app.core.config import settings
 
 router = APIRouter()
@@ -49,6 +52,11 @@ class StatisticsResponse(BaseModel):
     rag_enabled: bool
 
 
+async def _resolve(document_id: Optional[str]) -> Optional[str]:
+    """Map a deduplicated re-upload to the document holding its embeddings"""
+    return await database_service.resolve_document_id(document_id) if document_id else None
+
+
 @router.post("/ask", response_model=QuestionResponse)
 async def ask_question(request: QuestionRequest):
     """
@@ -71,7 +79,7 @@ async def ask_question(request: QuestionRequest):
     try:
         result = await rag_service.semantic_qa(
             question=request.question,
-            document_id=request.document_id,
+            document_id=await _resolve(request.document_id),
             top_k=request.top_k
         )
 
@@ -82,6 +90,8 @@ async def ask_question(request: QuestionRequest):
             num_sources_used=result["num_sources_used"]
         )
 
+    except OllamaOverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -89,6 +99,55 @@ async def ask_question(request: QuestionRequest):
         )
 
 
+def _sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a question about bias patterns using RAG, streamed as Server-Sent Events.
+
+    Events, in order:
+    - `sources`: the retrieved context sources, sent as soon as retrieval finishes
+    - `token`: a piece of the answer, sent as Ollama generates it
+    - `done`: the answer is complete
+    - `error`: generation failed; the stream ends
+    """
+    if not settings.RAG_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RAG feature is disabled"
+        )
+
+    document_id = await _resolve(request.document_id)
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for item in rag_service.semantic_qa_stream(
+                question=request.question,
+                document_id=document_id,
+                top_k=request.top_k
+            ):
+                event = item.pop("event")
+                yield _sse_event(event, item)
+            yield _sse_event("done", {"question": request.question})
+        except OllamaOverloadedError as e:
+            yield _sse_event("error", {"detail": e.detail, "retry_after": e.retry_after})
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Error processing question: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        }
+    )
+
+
 @router.post("/context", response_model=ContextResponse)
 async def get_relevant_context(request: ContextRequest):
     """
@@ -106,7 +165,7 @@ async def get_relevant_context(request: ContextRequest):
     try:
         context_chunks = await rag_service.retrieve_relevant_context(
             query_text=request.text,
-            exclude_document_id=request.exclude_document_id,
+            exclude_document_id=await _resolve(request.exclude_document_id),
             top_k=request.top_k
         )
 
@@ -153,13 +212,16 @@ async def get_statistics():
 
 
 @router.get("/status")
-async def get_rag_status():
+async def get_rag_status(fresh: bool = Query(default=False, description="Check Ollama live instead of using the cached status")):
     """
     Get the current status of the RAG system (Ollama + ChromaDB).
     """
     from app.services.ollama_service import ollama_service
+    from app.services.embedding_cache import embedding_cache
+    from app.services.extraction_pool import extraction_pool
+    from app.services.text_cache import text_cache
 
-    ollama_status = await ollama_service.get_status()
+    ollama_status = await ollama_service.get_status(fresh=fresh)
 
     return {
         "rag_enabled": settings.RAG_ENABLED,
@@ -169,5 +231,11 @@ async def get_rag_status():
         "ollama_status": ollama_status,
         "embedding_model": settings.OLLAMA_EMBEDDING_MODEL,
         "analysis_model": settings.OLLAMA_MODEL,
-        "vector_db": "ChromaDB (local)"
+        "vector_db": "ChromaDB (local)",
+        "embedding_cache": embedding_cache.get_stats(),
+        "scheduler": ollama_service.scheduler.get_stats(),
+        "coalescing": ollama_service.get_coalescing_stats(),
+        "analysis_output": ollama_service.get_analysis_output_stats(),
+        "extraction": extraction_pool.get_stats(),
+        "text_cache": text_cache.get_stats()
     }
@@ -1,14 +1,89 @@
 """
 Semantic search endpoints - Using Ollama + ChromaDB (100% Local)
 """
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Body, HTTPException, status
+from app.core.config import settings
 from app.models.schemas import SearchQuery, SearchResponse, SearchResult
 from app.services.ollama_service import ollama_service
-from app.services.chroma_service import chroma_service
+from app.services.vector_store import vector_service
+from app.services.inference_scheduler import OllamaOverloadedError
 
 router = APIRouter()
 
 
+def _to_search_response(query: SearchQuery, results: List[Dict], started: float) -> SearchResponse:
+    """Convert VectorService results into the response model"""
+    search_results = [
+        SearchResult(
+            document_id=result["metadata"].get("document_id", ""),
+            filename=result["metadata"].get("filename", ""),
+            text_chunk=result["metadata"].get("text", ""),
+            relevance_score=result["score"],
+            start_offset=result["metadata"].get("start_offset"),
+            end_offset=result["metadata"].get("end_offset"),
+            metadata=result["metadata"]
+        )
+        for result in results
+    ]
+
+    return SearchResponse(
+        results=search_results,
+        query=query.query,
+        total_results=len(search_results),
+        mode=query.mode,
+        latency_ms=round(1000 * (time.monotonic() - started), 2)
+    )
+
+
+async def _embed_queries(texts: List[str]) -> List[List[float]]:
+    """
+    Embed search queries - the one embedding path of /search and /search/batch,
+    so a query gets the same vector (and scores) through either endpoint
+    """
+    vectors = await ollama_service.generate_embeddings(texts)
+    if len(vectors) != len(texts) or not all(vectors):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not generate embedding. Make sure Ollama is running."
+        )
+    return vectors
+
+
+async def _run_search(query: SearchQuery, query_embedding: Optional[List[float]]) -> List[Dict]:
+    """Run one query in its mode (the embedding is unused in keyword mode)"""
+    if query.mode == "keyword":
+        return await vector_service.keyword_search(
+            query_text=query.query,
+            top_k=query.top_k,
+            filter=query.filter
+        )
+
+    if query.mode == "hybrid":
+        return await vector_service.hybrid_search(
+            query_text=query.query,
+            query_embedding=query_embedding,
+            top_k=query.top_k,
+            filter=query.filter,
+            nprobes=query.nprobes,
+            refine_factor=query.refine_factor,
+            ef=query.ef
+        )
+
+    # Search in ChromaDB
+    return await vector_service.search(
+        query_embedding=query_embedding,
+        top_k=query.top_k,
+        filter=query.filter,
+        nprobes=query.nprobes,
+        refine_factor=query.refine_factor,
+        ef=query.ef
+    )
+
+
 @router.post("/", response_model=SearchResponse)
 async def semantic_search(query: SearchQuery):
     """
@@ -16,48 +91,99 @@ async def semantic_search(query: SearchQuery):
 
     Uses Ollama for embeddings and ChromaDB for vector search.
     100% local - no API keys needed!
+
+    mode: "vector" (semantic), "keyword" (BM25 full-text, no embedding
+    needed) or "hybrid" (both, merged with reciprocal rank fusion)
     """
     try:
-        # Generate embedding for the search query using Ollama
-        query_embedding = await ollama_service.generate_embedding(query.query)
+        started = time.monotonic()
 
-        if not query_embedding:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Could not generate embedding. Make sure Ollama is running."
-            )
+        query_embedding = None
+        if query.mode != "keyword":
+            # Generate embedding for the search query using Ollama
+            query_embedding = (await _embed_queries([query.query]))[0]
 
-        # Search in ChromaDB
-        results = await chroma_service.search(
-            query_embedding=query_embedding,
-            top_k=query.top_k,
-            filter=query.filter
+        results = await _run_search(query, query_embedding)
+        return _to_search_response(query, results, started)
+
+    except (HTTPException, OllamaOverloadedError):
+        raise
+    except NotImplementedError as e:
+        # Search mode not supported by the configured vector backend
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error performing search: {str(e)}"
         )
 
-        # Convert to response model
-        search_results = [
-            SearchResult(
-                document_id=result["metadata"].get("document_id", ""),
-                filename=result["metadata"].get("filename", ""),
-                text_chunk=result["metadata"].get("text", ""),
-                relevance_score=result["score"],
-                metadata=result["metadata"]
+
+@router.post("/batch", response_model=List[SearchResponse])
+async def batch_search(
+    queries: List[SearchQuery] = Body(..., min_length=1, max_length=settings.SEARCH_BATCH_MAX_QUERIES)
+):
+    """
+    Run many searches in one request - responses come back in input order
+
+    - All queries needing an embedding are embedded in one batched call
+    - Vector queries sharing the same filter and index parameters go to the
+      backend's search_many in one call (one matrix product for the NumPy
+      backend); keyword and hybrid queries (and vector groups) run concurrently
+    """
+    try:
+        started = time.monotonic()
+
+        # One batched embedding call for every vector / hybrid query
+        to_embed = [i for i, query in enumerate(queries) if query.mode != "keyword"]
+        embeddings: Dict[int, List[float]] = {}
+        if to_embed:
+            vectors = await _embed_queries([queries[i].query for i in to_embed])
+            embeddings = dict(zip(to_embed, vectors))
+
+        # Vector queries that can share one Lance query
+        groups: Dict[str, List[int]] = {}
+        for i, query in enumerate(queries):
+            if query.mode == "vector":
+                key = json.dumps(
+                    [query.filter, query.nprobes, query.refine_factor, query.ef],
+                    sort_keys=True, default=str
+                )
+                groups.setdefault(key, []).append(i)
+
+        results: List[Optional[List[Dict]]] = [None] * len(queries)
+
+        async def run_group(indices: List[int]):
+            first = queries[indices[0]]
+            grouped = await vector_service.search_many(
+                [embeddings[i] for i in indices],
+                top_k=max(queries[i].top_k for i in indices),
+                filter=first.filter,
+                nprobes=first.nprobes,
+                refine_factor=first.refine_factor,
+                ef=first.ef
             )
-            for result in results
-        ]
+            for i, group_results in zip(indices, grouped):
+                results[i] = group_results[:queries[i].top_k]
+
+        async def run_single(i: int):
+            results[i] = await _run_search(queries[i], embeddings.get(i))
 
-        return SearchResponse(
-            results=search_results,
-            query=query.query,
-            total_results=len(search_results)
+        await asyncio.gather(
+            *(run_group(indices) for indices in groups.values()),
+            *(run_single(i) for i, query in enumerate(queries) if query.mode != "vector")
         )
 
-    except HTTPException:
+        return [_to_search_response(query, result, started) for query, result in zip(queries, results)]
+
+    except (HTTPException, OllamaOverloadedError):
         raise
+    except NotImplementedError as e:
+        # Search mode not supported by the configured vector backend
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error performing search: {str(e)}"
+            detail=f"Error performing batch search: {str(e)}"
         )
 
 
@@ -67,7 +193,7 @@ async def get_search_stats():
     Get statistics about the vector database (ChromaDB)
     """
     try:
-        stats = await chroma_service.get_stats()
+        stats = await vector_service.get_stats()
         return stats
     except Exception as e:
         raise HTTPException(
@@ -20,9 +20,77 @@ class Settings(BaseSettings):
     OLLAMA_MODEL: str = "llama3.2"  # Fast and capable - alternatives: mistral, phi3
     OLLAMA_EMBEDDING_MODEL: str = "nomic-embed-text"  # Best local embedding model
 
+    # Ollama HTTP connection pool (shared client, opened in the app lifespan)
+    OLLAMA_MAX_CONNECTIONS: int = 20
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OLLAMA_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 120.0  # Longer timeout for local inference
+    OLLAMA_WRITE_TIMEOUT: float = 30.0
+    OLLAMA_POOL_TIMEOUT: float = 10.0  # wait for a free connection from the pool
+
+    # Batched embeddings (Ollama /api/embed)
+    OLLAMA_EMBED_BATCH_SIZE: int = 32  # texts per /api/embed request
+    OLLAMA_EMBED_MAX_CONCURRENT_BATCHES: int = 2
+
+    # Inference scheduler: concurrent Ollama calls per call type and queue limits
+    OLLAMA_EMBED_CONCURRENCY: int = 4
+    OLLAMA_CHAT_CONCURRENCY: int = 2
+    OLLAMA_ANALYZE_CONCURRENCY: int = 2
+    OLLAMA_MAX_QUEUE_INTERACTIVE: int = 32  # queued calls per call type before 429
+    OLLAMA_MAX_QUEUE_BULK: int = 1024
+    OLLAMA_INTERACTIVE_QUEUE_TIMEOUT: float = 120.0  # seconds queued before 503
+
+    # Ollama status snapshot refreshed in the background (health endpoints read it)
+    OLLAMA_STATUS_POLL_INTERVAL: float = 10.0
+    OLLAMA_STATUS_TTL: float = 30.0  # older snapshots trigger a live check
+
+    # Long-document analysis (map-reduce over chunks instead of truncation)
+    ANALYSIS_CHUNKED_ENABLED: bool = True
+    ANALYSIS_CHUNK_SIZE: int = 5000  # characters per analyzed chunk
+    ANALYSIS_CHUNK_OVERLAP: int = 200
+    ANALYSIS_MAX_WORKERS: int = 2  # chunks analyzed concurrently
+    ANALYSIS_JSON_MAX_RETRIES: int = 1  # re-generations when output is malformed JSON
+
+    # Vector backend: lancedb (persistent, default), numpy (in-memory) or pinecone
+    VECTOR_BACKEND: str = "lancedb"
+    PINECONE_API_KEY: Optional[str] = None  # only needed with VECTOR_BACKEND=pinecone
+    PINECONE_INDEX_NAME: str = "bias-detector"
+    PINECONE_ENVIRONMENT: str = "us-east-1"
+
     # ChromaDB Configuration (Local Vector Database - No API key needed!)
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     EMBEDDING_DIMENSION: int = 768  # nomic-embed-text produces 768-dim vectors
+    EMBEDDING_CHUNK_TOKENS: int = 400  # approximate tokens per embedded chunk (whole sentences)
+    EMBEDDING_CHUNK_OVERLAP_TOKENS: int = 40
+    # Vector storage format, fixed when the table is created (reset to change it)
+    VECTOR_STORAGE_PRECISION: str = "float32"  # float32 or float16 (half the vector bytes)
+    VECTOR_STORAGE_DIM: Optional[int] = None  # Matryoshka truncation, e.g. 512 or 256 for nomic-embed-text
+    VECTOR_DB_THREADS: int = 4  # thread pool for blocking LanceDB I/O
+
+    # ANN index on the vector table (built automatically past VECTOR_INDEX_MIN_ROWS)
+    VECTOR_INDEX_ENABLED: bool = True
+    VECTOR_INDEX_TYPE: str = "IVF_PQ"  # IVF_PQ, or IVF_HNSW_SQ (int8 scalar quantization, float32 storage only)
+    VECTOR_INDEX_MIN_ROWS: int = 10000
+    VECTOR_INDEX_RETRAIN_GROWTH: float = 0.5  # retrain after the table grows by 50%
+    VECTOR_INDEX_NPROBES: int = 20
+    VECTOR_INDEX_REFINE_FACTOR: Optional[int] = None
+    VECTOR_MAINTENANCE_INTERVAL: float = 300.0  # seconds between background checks
+
+    # Fragment compaction and old version cleanup (run by the maintenance task)
+    VECTOR_COMPACTION_ENABLED: bool = True
+    VECTOR_COMPACTION_MIN_SMALL_FILES: int = 8  # compact once this many small fragments pile up
+    VECTOR_VERSION_RETENTION: float = 3600.0  # seconds of table versions kept for readers
+
+    # Hybrid search (BM25 + vector, reciprocal rank fusion)
+    SEARCH_HYBRID_CANDIDATES: int = 4  # each side fetches this many times top_k candidates
+    SEARCH_RRF_K: int = 60
+    SEARCH_BATCH_MAX_QUERIES: int = 64  # queries per POST /search/batch
+
+    # Embedding cache (in-memory LRU + SQLite file inside CHROMA_PERSIST_DIR)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 2048
+    EMBEDDING_CACHE_DISK_ENTRIES: int = 200000
 
     # MongoDB Configuration (local)
     MONGODB_URL: str = "mongodb://localhost:27017"
@@ -33,9 +101,17 @@ class Settings(BaseSettings):
     RAG_MAX_CONTEXT_CHUNKS: int = 5
     RAG_RELEVANCE_THRESHOLD: float = 0.7
 
+    # Document extraction process pool (PDF/DOCX parsing)
+    EXTRACTION_WORKERS: int = 0  # 0 = one worker per CPU core
+    EXTRACTION_TIMEOUT: float = 60.0  # seconds per document before its worker is killed
+    EXTRACTION_MEMORY_LIMIT_MB: int = 1024  # address-space cap per worker (0 = no cap)
+    EXTRACTION_MAX_TASKS_PER_WORKER: int = 50  # recycle workers to bound leaks
+    TEXT_CACHE_ZSTD_LEVEL: int = 3  # extracted text is cached zstd-compressed under UPLOAD_DIR/text_cache
+
     # File Upload Configuration
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     UPLOAD_DIR: str = "./uploads"
+    UPLOAD_CHUNK_SIZE: int = 1048576  # bytes read per step while streaming an upload to disk
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -2,7 +2,7 @@
 Pydantic models for request/response schemas
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -29,6 +29,29 @@ class BiasInstance(BaseModel):
     suggestions: Optional[str] = Field(None, description="Suggestions for improvement")
 
 
+class BiasAnalysisOutput(BaseModel):
+    """Structured bias analysis the LLM is constrained to produce"""
+    overall_score: float = Field(..., ge=0, le=1, description="Overall bias score from 0 to 1")
+    summary: str = Field(..., description="Summary of the analysis")
+    bias_instances: List[BiasInstance]
+
+
+def inline_json_schema(schema: Dict) -> Dict:
+    """Resolve $ref/$defs so the schema is self-contained (for Ollama's `format`)"""
+    definitions = schema.get("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(definitions[node["$ref"].split("/")[-1]])
+            return {key: resolve(value) for key, value in node.items() if key != "$defs"}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return resolve(schema)
+
+
 class BiasAnalysisResult(BaseModel):
     """Result of bias analysis"""
     document_id: str
@@ -45,6 +68,8 @@ class DocumentUploadResponse(BaseModel):
     file_size: int
     file_type: str
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    deduplicated: bool = Field(False, description="Same content as an earlier upload: stored as an alias of it")
+    duplicate_of: Optional[str] = Field(None, description="Document whose text, embeddings and analyses this upload shares")
 
 
 class DocumentMetadata(BaseModel):
@@ -56,6 +81,7 @@ class DocumentMetadata(BaseModel):
     uploaded_at: datetime
     analyzed: bool = False
     analysis_id: Optional[str] = None
+    duplicate_of: Optional[str] = None
 
 
 class SearchQuery(BaseModel):
@@ -63,6 +89,12 @@ class SearchQuery(BaseModel):
     query: str = Field(..., min_length=1, max_length=500)
     top_k: int = Field(default=5, ge=1, le=20)
     filter: Optional[Dict] = None
+    nprobes: Optional[int] = Field(None, ge=1, le=4096, description="IVF partitions to probe (ANN index only)")
+    refine_factor: Optional[int] = Field(None, ge=1, le=100, description="Re-rank refine_factor * top_k candidates exactly (ANN index only)")
+    ef: Optional[int] = Field(None, ge=1, le=10000, description="HNSW search breadth (HNSW index only)")
+    mode: Literal["vector", "keyword", "hybrid"] = Field(
+        "vector", description="vector (semantic), keyword (BM25 full-text) or hybrid (rank fusion of both)"
+    )
 
 
 class SearchResult(BaseModel):
@@ -71,6 +103,8 @@ class SearchResult(BaseModel):
     filename: str
     text_chunk: str
     relevance_score: float = Field(..., ge=0, le=1)
+    start_offset: Optional[int] = Field(None, description="Start of the chunk in the document's extracted text")
+    end_offset: Optional[int] = Field(None, description="End of the chunk in the document's extracted text")
     metadata: Dict
 
 
@@ -79,6 +113,8 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     query: str
     total_results: int
+    mode: str = "vector"
+    latency_ms: Optional[float] = None
 
 
 class AnalysisRequest(BaseModel):
@@ -3,11 +3,136 @@ LanceDB service for local vector storage - 100% stable
 Corrigé pour ne jamais planter, table créée automatiquement
 """
 
+import asyncio
 import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from functools import partial
 import lancedb
+import numpy as np
 import pyarrow as pa
-from typing import List, Dict, Optional
+import pyarrow.compute as pc
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from app.core.config import settings
+from app.services.vector_backend import SEARCH_MODES, reciprocal_rank_fusion
+
+
+def _sql_str(value: str) -> str:
+    """Littéral SQL échappé pour les prédicats Lance"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# Colonnes couvertes par un index scalaire BTREE
+SCALAR_INDEX_COLUMNS = ["document_id", "id"]
+
+# Type Arrow de la colonne vector pour chaque précision de stockage.
+# Lance ne sait pas chercher sur une colonne int8 : la quantification
+# scalaire int8 n'existe que comme type d'index (VECTOR_INDEX_TYPE=IVF_HNSW_SQ),
+# qui s'ajoute aux vecteurs float32 au lieu de les remplacer.
+STORAGE_VALUE_TYPES = {
+    "float32": pa.float32(),
+    "float16": pa.float16(),
+}
+
+# Clé de métadonnée du schéma portant l'identité de la table
+TABLE_ID_KEY = "table_id"
+
+# Colonnes renvoyées avec les résultats (le vecteur n'est jamais relu)
+RESULT_COLUMNS = ["id", "text", "document_id", "filename", "chunk_index", "start_offset", "end_offset"]
+
+# Position des chunks dans le texte du document (colonnes ajoutées aux tables existantes)
+OFFSET_COLUMNS = {"start_offset": "CAST(NULL AS INT)", "end_offset": "CAST(NULL AS INT)"}
+
+
+def arrow_to_results(table: pa.Table, with_score: bool = True) -> List[Dict]:
+    """
+    Construire la liste de résultats directement depuis les colonnes Arrow
+
+    Chaque colonne est convertie une seule fois en liste Python, puis les
+    dictionnaires sont assemblés par zip - sans pandas ni iterrows().
+
+    Score : 1 / (1 + distance) pour une recherche vectorielle, BM25
+    divisé par le meilleur score du lot pour une recherche plein texte.
+    """
+    if table.num_rows == 0:
+        return []
+
+    columns = [table.column(name).to_pylist() for name in RESULT_COLUMNS]
+    if with_score and "_distance" in table.column_names:
+        distances = table.column("_distance")
+        scores = pc.divide(1.0, pc.add(pc.cast(distances, pa.float64()), 1.0)).to_pylist()
+    elif with_score and "_score" in table.column_names:
+        bm25 = pc.cast(table.column("_score"), pa.float64())
+        best = pc.max(bm25).as_py() or 1.0
+        scores = pc.divide(bm25, best).to_pylist()
+    else:
+        scores = None
+
+    results = []
+    for i, (row_id, text, document_id, filename, chunk_index, start, end) in enumerate(zip(*columns)):
+        result = {
+            "id": row_id,
+            "metadata": {
+                "text": text,
+                "document_id": document_id,
+                "filename": filename,
+                "chunk_index": chunk_index,
+                "start_offset": start,
+                "end_offset": end,
+            }
+        }
+        if scores is not None:
+            result["score"] = scores[i]
+        results.append(result)
+    return results
+
+
+def compact_vectors(vectors, dim: Optional[int], value_type: pa.DataType) -> np.ndarray:
+    """
+    Mettre des embeddings au format de stockage de la table
+
+    Troncature Matryoshka : nomic-embed-text concentre l'information dans
+    les premières dimensions, on garde les dim premières puis on
+    renormalise (norme L2 = 1). Les valeurs sont ensuite converties dans
+    le type de la colonne (float32 ou float16).
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    if dim and dim < matrix.shape[1]:
+        matrix = matrix[:, :dim]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+    return matrix.astype(value_type.to_pandas_dtype(), copy=False)
+
+
+def build_where(filter: Optional[Dict] = None, exclude: Optional[Dict] = None) -> Optional[str]:
+    """
+    Prédicat SQL Lance à partir de filtres d'égalité et d'exclusion
+
+    Les valeurs peuvent être une chaîne ou une liste de chaînes :
+    {"document_id": "a"} -> document_id = 'a'
+    exclude {"document_id": ["a", "b"]} -> document_id NOT IN ('a', 'b')
+    """
+    clauses = []
+    for column, value in (filter or {}).items():
+        if column not in RESULT_COLUMNS or value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            clauses.append(f"{column} IN ({', '.join(_sql_str(v) for v in value)})")
+        else:
+            clauses.append(f"{column} = {_sql_str(value)}")
+    for column, value in (exclude or {}).items():
+        if column not in RESULT_COLUMNS or value in (None, [], ()):
+            continue
+        if isinstance(value, (list, tuple)):
+            clauses.append(f"{column} NOT IN ({', '.join(_sql_str(v) for v in value)})")
+        else:
+            clauses.append(f"{column} != {_sql_str(value)}")
+    return " AND ".join(clauses) if clauses else None
 
 
 class VectorService:
@@ -15,6 +140,8 @@ class VectorService:
     LanceDB Vector Store pour RAG
     - Auto table creation
     - Safe search before ingestion
+    - Toutes les E/S LanceDB passent par un pool de threads dédié,
+      la boucle d'événements n'est jamais bloquée
     """
 
     def __init__(self):
@@ -22,7 +149,54 @@ class VectorService:
         self.table_name = "bias_detector_docs"
         self.db = None
         self.table = None
-        self.default_embedding_dim = 768
+        self.default_embedding_dim = settings.EMBEDDING_DIMENSION
+        # Identité de la table (métadonnée du schéma) : la version Lance repart
+        # de zéro quand la table est recréée
+        self.table_id: Optional[str] = None
+
+        # Format de la colonne vector (relu depuis le schéma à l'ouverture)
+        self.vector_dim: Optional[int] = None
+        self.vector_type: pa.DataType = STORAGE_VALUE_TYPES.get(
+            settings.VECTOR_STORAGE_PRECISION, pa.float32()
+        )
+
+        # Pool dédié aux appels LanceDB bloquants
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.VECTOR_DB_THREADS,
+            thread_name_prefix="lancedb"
+        )
+        self._table_lock: Optional[asyncio.Lock] = None
+
+        # Index ANN géré automatiquement
+        self.index_name = "vector_idx"
+        self.index_state: Dict = {
+            "status": "none",  # none | not_needed | building | ready | error
+            "index_type": self._index_type(),
+            "indexed_rows": 0,
+            "built_at": None,
+            "build_seconds": None,
+            "last_error": None,
+        }
+        self._index_building = False
+        self._scalar_index_ready = False
+        self._fts_index_ready = False
+        self._search_latencies: Dict[str, deque] = {
+            mode: deque(maxlen=1000) for mode in SEARCH_MODES + ("batch",)
+        }
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+        # Compaction et purge des versions
+        self.storage_state: Dict = {
+            "num_fragments": None,
+            "num_small_files": None,
+            "num_deleted_rows": None,
+            "num_versions": None,
+            "last_compaction": None,
+            "compaction_seconds": None,
+            "fragments_before_compaction": None,
+            "last_error": None,
+        }
+        self._compacting = False
 
         # Connexion DB seulement
         os.makedirs(self.db_path, exist_ok=True)
@@ -30,27 +204,92 @@ class VectorService:
 
     # ---------------------- Helpers internes ----------------------
 
-    def _ensure_table(self, embedding_dim: Optional[int] = None):
-        """Créer la table si elle n'existe pas"""
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Exécuter un appel LanceDB bloquant dans le pool dédié"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def _open_or_create_table(self, embedding_dim: Optional[int], create: bool):
+        """Ouvrir la table, la créer si demandé (bloquant)"""
         if self.table is not None:
             return  # Table déjà ouverte
 
         if self.table_name in self.db.table_names():
             self.table = self.db.open_table(self.table_name)
-        else:
+        elif create:
             dim = embedding_dim or self.default_embedding_dim
+            if settings.VECTOR_STORAGE_DIM:
+                dim = min(dim, settings.VECTOR_STORAGE_DIM)
             self.table = self.db.create_table(
                 self.table_name,
-                pa.schema([
+                schema=pa.schema([
                     pa.field("id", pa.string()),
                     pa.field("text", pa.string()),
                     pa.field("document_id", pa.string()),
                     pa.field("filename", pa.string()),
                     pa.field("chunk_index", pa.int32()),
-                    pa.field("vector", pa.list_(pa.float32(), dim)),
-                ])
+                    pa.field("start_offset", pa.int32()),
+                    pa.field("end_offset", pa.int32()),
+                    pa.field("vector", pa.list_(
+                        STORAGE_VALUE_TYPES.get(settings.VECTOR_STORAGE_PRECISION, pa.float32()), dim
+                    )),
+                ], metadata={TABLE_ID_KEY: uuid.uuid4().hex})
             )
 
+        if self.table is not None:
+            missing = {name: sql for name, sql in OFFSET_COLUMNS.items() if name not in self.table.schema.names}
+            if missing:
+                self.table.add_columns(missing)  # Tables créées avant les offsets : NULL jusqu'à la réindexation
+            self._read_table_id()
+            self._read_vector_format()
+
+    def _read_table_id(self):
+        """Lire l'identité de la table, en attribuer une aux tables qui n'en ont pas (bloquant)"""
+        metadata = {
+            key.decode(): value.decode()
+            for key, value in (self.table.schema.metadata or {}).items()
+        }
+        if TABLE_ID_KEY not in metadata:
+            metadata[TABLE_ID_KEY] = uuid.uuid4().hex
+            self.table.to_lance().replace_schema_metadata(metadata)
+            self.table = self.db.open_table(self.table_name)  # Relire le manifeste mis à jour
+        self.table_id = metadata[TABLE_ID_KEY]
+
+    def _read_vector_format(self):
+        """
+        Relire dimension et type de la colonne vector depuis le schéma
+
+        Une table existante garde son format : changer la précision ou la
+        dimension dans la config ne s'applique qu'après reset().
+        """
+        vector_type = self.table.schema.field("vector").type
+        self.vector_dim = vector_type.list_size
+        self.vector_type = vector_type.value_type
+
+        wanted_type = STORAGE_VALUE_TYPES.get(settings.VECTOR_STORAGE_PRECISION, pa.float32())
+        wanted_dim = settings.VECTOR_STORAGE_DIM
+        if self.vector_type != wanted_type or (wanted_dim and wanted_dim != self.vector_dim):
+            print(
+                f"Vector table stores {self.vector_dim} x {self.vector_type}, config asks for "
+                f"{wanted_dim or 'full'} x {settings.VECTOR_STORAGE_PRECISION}; "
+                f"reset the table to apply the new format"
+            )
+
+    async def _ensure_table(self, embedding_dim: Optional[int] = None, create: bool = True):
+        """Créer la table si elle n'existe pas (ou seulement l'ouvrir si create=False)"""
+        if self.table is not None:
+            return  # Table déjà ouverte
+
+        if self._table_lock is None:
+            self._table_lock = asyncio.Lock()
+        async with self._table_lock:
+            await self._run(self._open_or_create_table, embedding_dim, create)
+
+    async def _has_rows(self) -> bool:
+        """La table existe et contient des lignes"""
+        await self._ensure_table(create=False)
+        return self.table is not None and await self._run(self.table.count_rows) > 0
+
     # ---------------------- API publiques ----------------------
 
     async def upsert_document(
@@ -58,107 +297,613 @@ class VectorService:
         document_id: str,
         text_chunks: List[str],
         embeddings: List[List[float]],
-        metadata: Dict
+        metadata: Dict,
+        chunk_offsets: Optional[List[Tuple[int, int]]] = None
     ) -> bool:
-        """Insérer ou remplacer des chunks d'un document"""
+        """
+        Insérer ou remplacer des chunks d'un document
+
+        merge-insert sur id : les chunks existants sont réécrits en place,
+        les nouveaux ajoutés, puis seuls les chunks en trop (document
+        raccourci) sont supprimés, au lieu de tout effacer et réinsérer.
+        chunk_offsets : (début, fin) de chaque chunk dans le texte du
+        document, stockés dans start_offset / end_offset (NULL si absent).
+        """
         if not embeddings:
             return True
 
         embedding_dim = len(embeddings[0])
-        self._ensure_table(embedding_dim)
+        await self._ensure_table(embedding_dim)
 
-        await self.delete_document(document_id)
-
-        rows = [
-            {
-                "id": f"{document_id}_chunk_{i}",
-                "text": text,
-                "document_id": document_id,
-                "filename": metadata.get("filename", ""),
-                "chunk_index": i,
-                "vector": vector,
-            }
-            for i, (text, vector) in enumerate(zip(text_chunks, embeddings))
-        ]
+        def merge_rows():
+            count = min(len(text_chunks), len(embeddings))
+            if count == 0:
+                return
+            vectors = compact_vectors(embeddings[:count], self.vector_dim, self.vector_type)
+            rows = pa.table({
+                "id": [f"{document_id}_chunk_{i}" for i in range(count)],
+                "text": text_chunks[:count],
+                "document_id": [document_id] * count,
+                "filename": [metadata.get("filename", "")] * count,
+                "chunk_index": pa.array(range(count), pa.int32()),
+                "start_offset": pa.array(
+                    [offsets[0] for offsets in chunk_offsets[:count]] if chunk_offsets else [None] * count, pa.int32()
+                ),
+                "end_offset": pa.array(
+                    [offsets[1] for offsets in chunk_offsets[:count]] if chunk_offsets else [None] * count, pa.int32()
+                ),
+                "vector": pa.FixedSizeListArray.from_arrays(
+                    pa.array(vectors.ravel(), self.vector_type), vectors.shape[1]
+                ),
+            }, schema=self.table.schema)
+            (
+                self.table.merge_insert("id")
+                .when_matched_update_all()
+                .when_not_matched_insert_all()
+                .execute(rows)
+            )
+            if self._document_has_chunks_from(document_id, count):
+                self.table.delete(
+                    f"document_id = {_sql_str(document_id)} AND chunk_index >= {count}"
+                )
 
-        if rows:
-            self.table.add(rows)
+        await self._run(merge_rows)
+        if not self._scalar_index_ready:
+            await self.ensure_scalar_index()
+        if not self._fts_index_ready:
+            await self.ensure_fts_index()
         return True
 
     async def search(
         self,
         query_embedding: List[float],
         top_k: int = 5,
-        filter: Optional[Dict] = None
+        filter: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None,
+        exclude: Optional[Dict] = None,
+        max_distance: Optional[float] = None
     ) -> List[Dict]:
-        """Recherche sémantique"""
-        if self.table is None or self.table.count_rows() == 0:
+        """
+        Recherche sémantique
+
+        filter/exclude sont appliqués dans Lance avant la recherche
+        (prefilter) et max_distance coupe les voisins trop éloignés :
+        top_k résultats utiles reviennent sans sur-échantillonnage.
+
+        nprobes/refine_factor (IVF_PQ) et ef (HNSW) ne s'appliquent que
+        lorsque l'index ANN existe ; sinon la recherche reste exhaustive.
+        """
+        if not await self._has_rows():
             return []  # Table vide ou inexistante
 
-        query = self.table.search(query_embedding).limit(top_k)
-        if filter and "document_id" in filter:
-            query = query.where(f"document_id = '{filter['document_id']}'")
-        df = query.to_pandas()
-
-        results = []
-        for _, row in df.iterrows():
-            distance = row.get("_distance", 0)
-            results.append({
-                "id": row["id"],
-                "score": 1 / (1 + distance),
-                "metadata": {
-                    "text": row["text"],
-                    "document_id": row["document_id"],
-                    "filename": row["filename"],
-                    "chunk_index": row["chunk_index"],
-                }
-            })
+        started = time.monotonic()
+        results = await self._run(
+            self._vector_query, query_embedding, top_k, filter, exclude,
+            max_distance, nprobes, refine_factor, ef
+        )
+        self._record_latency("vector", started)
         return results
 
-    async def get_document_chunks(self, document_id: str) -> List[Dict]:
-        """Récupérer tous les chunks d'un document"""
-        if self.table is None or self.table.count_rows() == 0:
+    def _build_vector_query(
+        self,
+        query_vector: np.ndarray,
+        top_k: int,
+        filter: Optional[Dict],
+        exclude: Optional[Dict],
+        max_distance: Optional[float] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ):
+        """Construire la requête vectorielle Lance"""
+        use_index = self.index_state["status"] == "ready"
+        query = self.table.search(query_vector).limit(top_k)
+        if use_index:
+            query = query.nprobes(nprobes or settings.VECTOR_INDEX_NPROBES)
+            if refine_factor or settings.VECTOR_INDEX_REFINE_FACTOR:
+                query = query.refine_factor(refine_factor or settings.VECTOR_INDEX_REFINE_FACTOR)
+            if ef and "hnsw" in self.index_state["index_type"].lower():
+                query = query.ef(ef)
+        where = build_where(filter, exclude)
+        if where:
+            query = query.where(where, prefilter=True)
+        if max_distance is not None:
+            query = query.distance_range(upper_bound=max_distance)
+        return query.select(RESULT_COLUMNS)
+
+    def _vector_query(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filter: Optional[Dict],
+        exclude: Optional[Dict],
+        max_distance: Optional[float] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[Dict]:
+        """Requête vectorielle Lance (bloquant)"""
+        # Même troncature que les vecteurs stockés ; la requête reste en float32
+        query_vector = compact_vectors(query_embedding, self.vector_dim, pa.float32())[0]
+        query = self._build_vector_query(
+            query_vector, top_k, filter, exclude, max_distance, nprobes, refine_factor, ef
+        )
+        return arrow_to_results(query.to_arrow())
+
+    def _keyword_query(
+        self,
+        query_text: str,
+        top_k: int,
+        filter: Optional[Dict],
+        exclude: Optional[Dict]
+    ) -> List[Dict]:
+        """Requête plein texte BM25 sur la colonne text (bloquant)"""
+        query = self.table.search(query_text, query_type="fts").limit(top_k)
+        where = build_where(filter, exclude)
+        if where:
+            query = query.where(where, prefilter=True)
+        return arrow_to_results(query.select(RESULT_COLUMNS).to_arrow())
+
+    async def keyword_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Recherche plein texte (BM25) sur l'index FTS de la colonne text
+
+        Retrouve les termes exacts (noms, termes connotés, chiffres) que
+        la recherche sémantique rate ; les lignes pas encore indexées sont
+        parcourues à plat par Lance.
+        """
+        if not await self._has_rows():
+            return []
+        if not self._fts_index_ready and not await self.ensure_fts_index():
             return []
 
-        df = self.table.to_arrow_table().to_pandas()
-        df = df[df["document_id"] == document_id]
-
-        return [
-            {
-                "id": row["id"],
-                "metadata": {
-                    "text": row["text"],
-                    "document_id": row["document_id"],
-                    "filename": row["filename"],
-                    "chunk_index": row["chunk_index"],
-                }
+        started = time.monotonic()
+        results = await self._run(self._keyword_query, query_text, top_k, filter, exclude)
+        self._record_latency("keyword", started)
+        return results
+
+    async def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Recherche hybride : BM25 + vecteurs fusionnés par Reciprocal Rank Fusion
+
+        Les deux requêtes tournent en parallèle sur le pool LanceDB, chacune
+        sur SEARCH_HYBRID_CANDIDATES * top_k candidats, puis les classements
+        sont fusionnés (constante SEARCH_RRF_K).
+        """
+        if not await self._has_rows():
+            return []
+        if not self._fts_index_ready:
+            await self.ensure_fts_index()
+
+        candidates = top_k * settings.SEARCH_HYBRID_CANDIDATES
+        started = time.monotonic()
+        vector_results, keyword_results = await asyncio.gather(
+            self._run(
+                self._vector_query, query_embedding, candidates, filter, exclude,
+                None, nprobes, refine_factor, ef
+            ),
+            self._run(self._keyword_query, query_text, candidates, filter, exclude)
+            if self._fts_index_ready else asyncio.sleep(0, result=[])
+        )
+        results = reciprocal_rank_fusion(
+            [vector_results, keyword_results], top_k, k=settings.SEARCH_RRF_K
+        )
+        self._record_latency("hybrid", started)
+        return results
+
+    async def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """
+        Recherche sémantique de plusieurs requêtes (mêmes top_k, filtres et
+        paramètres d'index), résultats dans l'ordre d'entrée
+
+        Les requêtes tournent en parallèle sur le pool LanceDB. La requête
+        multi-vecteurs de Lance n'est pas utilisée : elle refait un scan
+        par vecteur sans gain de temps et garde en mémoire les tampons de
+        chaque scan (~35 Mo par requête sur 20k x 768).
+        """
+        if not query_embeddings:
+            return []
+        if not await self._has_rows():
+            return [[] for _ in query_embeddings]
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(
+            self._run(
+                self._vector_query, query_embedding, top_k, filter, exclude,
+                None, nprobes, refine_factor, ef
+            )
+            for query_embedding in query_embeddings
+        ))
+        self._record_latency("batch", started)
+        return list(results)
+
+    def _record_latency(self, mode: str, started: float):
+        self._search_latencies[mode].append(time.monotonic() - started)
+
+    def _latency_stats(self) -> Dict:
+        """Latence des requêtes Lance par mode (ms)"""
+        stats = {}
+        for mode, samples in self._search_latencies.items():
+            ordered = sorted(samples)
+            stats[mode] = {
+                "count": len(ordered),
+                "p50": round(1000 * ordered[int(0.5 * (len(ordered) - 1))], 2) if ordered else 0.0,
+                "p95": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 2) if ordered else 0.0,
             }
-            for _, row in df.iterrows()
-        ]
+        return stats
+
+    async def get_document_chunks(self, document_id: str, include_vector: bool = False) -> List[Dict]:
+        """
+        Récupérer tous les chunks d'un document, triés par chunk_index
+
+        Le filtre est poussé dans le scan Lance (index scalaire sur
+        document_id) et la colonne vector n'est lue que si include_vector.
+        """
+        if not await self._has_rows():
+            return []
+
+        columns = RESULT_COLUMNS + (["vector"] if include_vector else [])
+
+        def read_chunks():
+            table = self.table.to_lance().to_table(
+                columns=columns,
+                filter=f"document_id = {_sql_str(document_id)}"
+            ).sort_by("chunk_index")
+            results = arrow_to_results(table, with_score=False)
+            if include_vector:
+                for result, vector in zip(results, table.column("vector").to_pylist()):
+                    result["vector"] = vector
+            return results
+
+        return await self._run(read_chunks)
+
+    def _document_has_chunks_from(self, document_id: str, chunk_index: int) -> bool:
+        """Le document a-t-il des chunks d'indice >= chunk_index (bloquant)"""
+        stale = self.table.to_lance().to_table(
+            columns=["id"],
+            filter=f"document_id = {_sql_str(document_id)} AND chunk_index >= {chunk_index}",
+            limit=1
+        )
+        return stale.num_rows > 0
 
     async def delete_document(self, document_id: str) -> bool:
         """Supprimer un document"""
+        await self._ensure_table(create=False)
         if self.table is not None:
-            self.table.delete(lambda row: row["document_id"] == document_id)
+            await self._run(self.table.delete, f"document_id = {_sql_str(document_id)}")
         return True
 
+    async def get_table_version(self) -> str:
+        """
+        Version courante de la table (change à chaque écriture)
+
+        Préfixée par l'identité de la table : après reset() ou suppression du
+        répertoire, la version Lance recommence à 1 et ne suffit plus.
+        """
+        await self._ensure_table(create=False)
+        if self.table is None:
+            return "lancedb-none"
+        version = await self._run(lambda: self.table.version)
+        return f"lancedb-{self.table_id}-{version}"
+
+    # ---------------------- Index ANN ----------------------
+
+    @staticmethod
+    def _index_type() -> str:
+        """
+        Type d'index ANN selon la précision de stockage
+
+        VECTOR_INDEX_TYPE en float32 ; en float16 seul IVF_PQ sait
+        s'entraîner sur la colonne (pas d'IVF_HNSW_SQ).
+        """
+        if settings.VECTOR_STORAGE_PRECISION == "float16":
+            return "IVF_PQ"
+        return settings.VECTOR_INDEX_TYPE
+
+    def _index_params(self, num_rows: int, dim: int) -> Dict:
+        """Paramètres d'entraînement de l'index selon la taille de la table"""
+        index_type = self._index_type()
+        params = {
+            "metric": "L2",  # Même métrique que la recherche exhaustive
+            "index_type": index_type,
+            "num_partitions": max(1, min(4096, int(num_rows ** 0.5))),
+            "replace": True,
+        }
+        if index_type == "IVF_PQ":
+            # Sous-vecteurs de 16 dimensions quand c'est possible (768 -> 48)
+            params["num_sub_vectors"] = next(
+                (dim // width for width in (16, 8, 4, 2, 1) if dim % width == 0),
+                1
+            )
+        return params
+
+    def _sync_index_state(self):
+        """Relire l'état de l'index existant sur disque (bloquant)"""
+        indices = [idx for idx in self.table.list_indices() if "vector" in idx.columns]
+        if not indices:
+            return
+        stats = self.table.index_stats(indices[0].name)
+        self.index_name = indices[0].name
+        self.index_state.update({
+            "status": "ready",
+            "index_type": str(indices[0].index_type),
+            "indexed_rows": stats.num_indexed_rows if stats else 0,
+        })
+
+    async def maybe_build_index(self, force: bool = False) -> Dict:
+        """
+        Construire l'index ANN quand la table dépasse VECTOR_INDEX_MIN_ROWS,
+        puis le ré-entraîner quand elle a grossi de VECTOR_INDEX_RETRAIN_GROWTH
+
+        Returns:
+            L'état courant de l'index
+        """
+        if not settings.VECTOR_INDEX_ENABLED or self._index_building:
+            return self.index_state
+
+        await self._ensure_table(create=False)
+        if self.table is None:
+            return self.index_state
+
+        if self.index_state["status"] == "none":
+            await self._run(self._sync_index_state)
+
+        num_rows = await self._run(self.table.count_rows)
+        if num_rows < settings.VECTOR_INDEX_MIN_ROWS and not force:
+            if self.index_state["status"] == "none":
+                self.index_state["status"] = "not_needed"
+            return self.index_state
+
+        indexed_rows = self.index_state["indexed_rows"]
+        grown = num_rows >= indexed_rows * (1 + settings.VECTOR_INDEX_RETRAIN_GROWTH)
+        if self.index_state["status"] == "ready" and not grown and not force:
+            return self.index_state
+
+        self._index_building = True
+        previous_status = self.index_state["status"]
+        self.index_state["status"] = "building"
+        started = time.monotonic()
+
+        def build():
+            dim = self.table.schema.field("vector").type.list_size
+            self.table.create_index(**self._index_params(num_rows, dim))
+
+        try:
+            await self._run(build)
+            await self._run(self._sync_index_state)
+            self.index_state.update({
+                "status": "ready",
+                "indexed_rows": num_rows,
+                "built_at": datetime.utcnow().isoformat(),
+                "build_seconds": round(time.monotonic() - started, 2),
+                "last_error": None,
+            })
+        except Exception as e:
+            print(f"Error building vector index: {str(e)}")
+            self.index_state["status"] = "ready" if previous_status == "ready" else "error"
+            self.index_state["last_error"] = str(e)
+        finally:
+            self._index_building = False
+
+        return self.index_state
+
+    async def ensure_scalar_index(self) -> bool:
+        """
+        Index scalaires BTREE sur document_id (filtres par document) et
+        sur id (jointure du merge-insert)
+
+        Créés s'ils manquent, reconstruits quand de nouvelles lignes ne
+        sont pas encore indexées.
+        """
+        await self._ensure_table(create=False)
+        if self.table is None:
+            return False
+
+        def ensure():
+            if self.table.count_rows() == 0:
+                return False
+            existing = {tuple(idx.columns): idx.name for idx in self.table.list_indices()}
+            for column in SCALAR_INDEX_COLUMNS:
+                name = existing.get((column,))
+                if name is not None:
+                    stats = self.table.index_stats(name)
+                    if stats is None or stats.num_unindexed_rows == 0:
+                        continue
+                self.table.create_scalar_index(column, index_type="BTREE", replace=True)
+            return True
+
+        try:
+            self._scalar_index_ready = await self._run(ensure)
+        except Exception as e:
+            print(f"Error building document_id index: {str(e)}")
+        return self._scalar_index_ready
+
+    def _read_storage_stats(self) -> Dict:
+        """Fragments, lignes supprimées et versions de la table (bloquant)"""
+        dataset = self.table.to_lance()
+        stats = dataset.stats.dataset_stats()
+        return {
+            "num_fragments": stats["num_fragments"],
+            "num_small_files": stats["num_small_files"],
+            "num_deleted_rows": stats["num_deleted_rows"],
+            "num_versions": len(dataset.versions()),
+        }
+
+    async def maybe_compact(self, force: bool = False) -> Dict:
+        """
+        Compacter les fragments et purger les anciennes versions
+
+        La compaction (table.optimize) regroupe les petits fragments,
+        matérialise les suppressions et met à jour les index ; elle ne
+        tourne que si VECTOR_COMPACTION_MIN_SMALL_FILES est atteint ou si
+        des lignes supprimées traînent. Les versions plus vieilles que
+        VECTOR_VERSION_RETENTION sont purgées à chaque passage.
+
+        Returns:
+            L'état courant du stockage
+        """
+        await self._ensure_table(create=False)
+        if self.table is None or self._compacting:
+            return self.storage_state
+
+        self._compacting = True
+        retention = timedelta(seconds=settings.VECTOR_VERSION_RETENTION)
+        try:
+            before = await self._run(self._read_storage_stats)
+            needed = (
+                before["num_small_files"] >= settings.VECTOR_COMPACTION_MIN_SMALL_FILES
+                or before["num_deleted_rows"] > 0
+            )
+            if force or (settings.VECTOR_COMPACTION_ENABLED and needed):
+                started = time.monotonic()
+                await self._run(self.table.optimize, cleanup_older_than=retention)
+                self.storage_state.update({
+                    "last_compaction": datetime.utcnow().isoformat(),
+                    "compaction_seconds": round(time.monotonic() - started, 2),
+                    "fragments_before_compaction": before["num_fragments"],
+                })
+            elif before["num_versions"] > 1:
+                await self._run(lambda: self.table.to_lance().cleanup_old_versions(older_than=retention))
+            self.storage_state.update(await self._run(self._read_storage_stats))
+            self.storage_state["last_error"] = None
+        except Exception as e:
+            print(f"Error compacting vector table: {str(e)}")
+            self.storage_state["last_error"] = str(e)
+        finally:
+            self._compacting = False
+
+        return self.storage_state
+
+    async def ensure_fts_index(self) -> bool:
+        """
+        Index plein texte (BM25) sur la colonne text
+
+        Créé s'il manque. Les lignes ajoutées ensuite sont parcourues à
+        plat par Lance, puis intégrées à l'index par la compaction
+        (table.optimize) sans reconstruction.
+        """
+        await self._ensure_table(create=False)
+        if self.table is None:
+            return False
+
+        def ensure():
+            if any(idx.columns == ["text"] for idx in self.table.list_indices()):
+                return True
+            if self.table.count_rows() == 0:
+                return False
+            self.table.create_fts_index("text", use_tantivy=False, ascii_folding=True, replace=True)
+            return True
+
+        try:
+            self._fts_index_ready = await self._run(ensure)
+        except Exception as e:
+            print(f"Error building full-text index: {str(e)}")
+        return self._fts_index_ready
+
+    async def _maintenance_loop(self):
+        """Tâche de fond : entretien périodique de la table"""
+        while True:
+            try:
+                await self.maybe_compact()
+                await self.ensure_scalar_index()
+                await self.ensure_fts_index()
+                await self.maybe_build_index()
+            except Exception as e:
+                print(f"Vector maintenance error: {str(e)}")
+            await asyncio.sleep(settings.VECTOR_MAINTENANCE_INTERVAL)
+
+    def start_maintenance(self):
+        """Démarrer la tâche d'entretien en arrière-plan"""
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop_maintenance(self):
+        """Arrêter la tâche d'entretien"""
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self._maintenance_task = None
+
     async def get_stats(self) -> Dict:
         """Statistiques de la table"""
-        total_vectors = self.table.count_rows() if self.table else 0
+        await self._ensure_table(create=False)
+        total_vectors = await self._run(self.table.count_rows) if self.table is not None else 0
+        if self.table is not None:
+            try:
+                self.storage_state.update(await self._run(self._read_storage_stats))
+            except Exception as e:
+                print(f"Error reading vector storage stats: {str(e)}")
         return {
             "table_name": self.table_name,
             "db_path": self.db_path,
-            "total_vectors": total_vectors
+            "total_vectors": total_vectors,
+            "vector_format": {
+                "dim": self.vector_dim,
+                "type": str(self.vector_type),
+                "precision": settings.VECTOR_STORAGE_PRECISION,
+                "raw_vector_bytes": total_vectors * (self.vector_dim or 0) * self.vector_type.bit_width // 8,
+            },
+            "index": {
+                **self.index_state,
+                "unindexed_rows": max(0, total_vectors - self.index_state["indexed_rows"])
+                if self.index_state["status"] == "ready" else total_vectors,
+                "min_rows": settings.VECTOR_INDEX_MIN_ROWS,
+            },
+            "document_id_index": self._scalar_index_ready,
+            "fts_index": self._fts_index_ready,
+            "search_latency_ms": self._latency_stats(),
+            "storage": self.storage_state
         }
 
     async def reset(self) -> bool:
         """Supprimer et recréer la table"""
-        if self.table_name in self.db.table_names():
-            self.db.drop_table(self.table_name)
+        def drop():
+            if self.table_name in self.db.table_names():
+                self.db.drop_table(self.table_name)
+
+        await self._run(drop)
         self.table = None
-        self._ensure_table()
+        self.table_id = None
+        self.index_state.update({"status": "none", "indexed_rows": 0, "built_at": None})
+        self._scalar_index_ready = False
+        self._fts_index_ready = False
+        await self._ensure_table()
         return True
 
+    def close(self):
+        """Arrêter le pool de threads LanceDB"""
+        self.executor.shutdown(wait=True)
+
 
 # ---------------------- Singleton prêt à l'emploi ----------------------
 chroma_service = VectorService()
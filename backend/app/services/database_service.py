@@ -2,6 +2,7 @@
 MongoDB database service for persistent storage of analyses and documents
 """
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 from typing import List, Dict, Optional
 from datetime import datetime
 from app.core.config import settings
@@ -16,6 +17,7 @@ class DatabaseService:
         self.db = None
         self.documents_collection = None
         self.analyses_collection = None
+        self.analysis_cache_collection = None
         self.connected = False
 
     async def connect(self):
@@ -28,11 +30,21 @@ class DatabaseService:
             # Initialize collections
             self.documents_collection = self.db["documents"]
             self.analyses_collection = self.db["analyses"]
+            self.analysis_cache_collection = self.db["analysis_cache"]
 
             # Create indexes
             await self.documents_collection.create_index("document_id", unique=True)
+            # One original per content hash; aliases (alias_of) are not marked
+            # original. Partial indexes cannot match a missing alias_of, hence the flag.
+            await self.documents_collection.create_index(
+                "content_hash",
+                unique=True,
+                partialFilterExpression={"original": True},
+                name="content_hash_original"
+            )
             await self.analyses_collection.create_index("document_id")
             await self.analyses_collection.create_index("analyzed_at")
+            await self.analysis_cache_collection.create_index("cache_key", unique=True)
 
             self.connected = True
             print("Connected to MongoDB successfully")
@@ -54,11 +66,17 @@ class DatabaseService:
         """
         Save document metadata to database
 
+        When document_data carries a content_hash already claimed by another
+        document (the unique content_hash_original index), the new document
+        is saved as an alias of that original (alias_of) and shares its text,
+        embeddings and analyses.
+
         Args:
             document_data: Document information to save
 
         Returns:
-            Document ID if successful, None otherwise
+            ID of the document holding the content (the original's ID for an
+            alias, otherwise document_data's own ID), None on error
         """
         if not self.connected:
             return document_data.get("document_id")
@@ -67,17 +85,107 @@ class DatabaseService:
             document_data["created_at"] = datetime.utcnow()
             document_data["updated_at"] = datetime.utcnow()
 
+            content_hash = document_data.get("content_hash")
+            if content_hash and not document_data.get("alias_of"):
+                # Claim the hash; the unique index makes concurrent identical uploads
+                # race for it, and the losers are stored as aliases of the winner
+                try:
+                    await self.documents_collection.update_one(
+                        {"document_id": document_data["document_id"]},
+                        {"$set": {**document_data, "original": True}},
+                        upsert=True
+                    )
+                    return document_data["document_id"]
+                except DuplicateKeyError as e:
+                    details = e.details or {}
+                    if (
+                        "content_hash" not in details.get("keyPattern", {})
+                        and "content_hash_original" not in details.get("errmsg", "")
+                    ):
+                        raise
+                original = await self.documents_collection.find_one(
+                    {"content_hash": content_hash, "original": True}, {"document_id": 1}
+                )
+                if original:
+                    document_data["alias_of"] = original["document_id"]
+
             await self.documents_collection.update_one(
                 {"document_id": document_data["document_id"]},
                 {"$set": document_data},
                 upsert=True
             )
-            return document_data["document_id"]
+            return document_data.get("alias_of") or document_data["document_id"]
 
         except Exception as e:
             print(f"Error saving document: {str(e)}")
             return None
 
+    async def resolve_document_id(self, document_id: str) -> str:
+        """ID of the document holding the content: the original for an alias, else document_id itself"""
+        if not self.connected:
+            return document_id
+
+        try:
+            document = await self.documents_collection.find_one(
+                {"document_id": document_id}, {"alias_of": 1}
+            )
+            if document and document.get("alias_of"):
+                return document["alias_of"]
+            return document_id
+
+        except Exception as e:
+            print(f"Error resolving document: {str(e)}")
+            return document_id
+
+    async def promote_alias(self, document_id: str) -> Optional[str]:
+        """
+        Make the oldest alias of a document the new original
+
+        Remaining aliases and the analyses are moved over to it, so the
+        original can then be deleted without losing the shared content.
+
+        Returns:
+            ID of the promoted alias, None if the document has no alias
+        """
+        if not self.connected:
+            return None
+
+        try:
+            successor = await self.documents_collection.find_one(
+                {"alias_of": document_id}, sort=[("created_at", 1)]
+            )
+            if not successor:
+                return None
+
+            successor_id = successor["document_id"]
+            original = await self.documents_collection.find_one({"document_id": document_id}) or {}
+            inherited = {key: original[key] for key in ("analyzed", "last_analysis_id") if key in original}
+            # Release the content hash before the successor claims it
+            await self.documents_collection.update_one(
+                {"document_id": document_id},
+                {"$unset": {"original": ""}}
+            )
+            await self.documents_collection.update_one(
+                {"document_id": successor_id},
+                {
+                    "$unset": {"alias_of": ""},
+                    "$set": {**inherited, "original": True, "updated_at": datetime.utcnow()}
+                }
+            )
+            await self.documents_collection.update_many(
+                {"alias_of": document_id},
+                {"$set": {"alias_of": successor_id}}
+            )
+            await self.analyses_collection.update_many(
+                {"document_id": document_id},
+                {"$set": {"document_id": successor_id}}
+            )
+            return successor_id
+
+        except Exception as e:
+            print(f"Error promoting document alias: {str(e)}")
+            return None
+
     async def get_document(self, document_id: str) -> Optional[Dict]:
         """Get document metadata by ID"""
         if not self.connected:
@@ -256,6 +364,70 @@ class DatabaseService:
             print(f"Error retrieving all analyses: {str(e)}")
             return []
 
+    # ==================== Analysis Cache ====================
+
+    async def get_cached_analysis(self, cache_key: str) -> Optional[Dict]:
+        """
+        Get a cached analysis result
+
+        Args:
+            cache_key: Key built from document content and request parameters
+
+        Returns:
+            Cached result if present, None otherwise
+        """
+        if not self.connected:
+            return None
+
+        try:
+            cached = await self.analysis_cache_collection.find_one(
+                {"cache_key": cache_key},
+                {"_id": 0}
+            )
+            if cached:
+                await self.analysis_cache_collection.update_one(
+                    {"cache_key": cache_key},
+                    {"$inc": {"hit_count": 1}, "$set": {"last_hit_at": datetime.utcnow()}}
+                )
+            return cached
+
+        except Exception as e:
+            print(f"Error retrieving cached analysis: {str(e)}")
+            return None
+
+    async def save_cached_analysis(self, cache_key: str, result: Dict) -> bool:
+        """
+        Store an analysis result in the cache
+
+        Args:
+            cache_key: Key built from document content and request parameters
+            result: Analysis result to cache
+
+        Returns:
+            True if stored
+        """
+        if not self.connected:
+            return False
+
+        try:
+            await self.analysis_cache_collection.update_one(
+                {"cache_key": cache_key},
+                {
+                    "$set": {
+                        **result,
+                        "cache_key": cache_key,
+                        "cached_at": datetime.utcnow(),
+                        "hit_count": 0
+                    }
+                },
+                upsert=True
+            )
+            return True
+
+        except Exception as e:
+            print(f"Error caching analysis: {str(e)}")
+            return False
+
     # ==================== Statistics ====================
 
     async def get_statistics(self) -> Dict:
@@ -4,9 +4,155 @@ Document processing service for handling various file formats
 import PyPDF2
 import docx
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple
 import aiofiles
+import multipart
+from multipart.exceptions import FormParserError
+from multipart.multipart import parse_options_header
+import hashlib
+import os
+import re
 import uuid
+from app.services.extraction_pool import extraction_pool
+
+# Word pieces of at most 8 characters, or single punctuation marks: a cheap
+# stand-in for the embedding model's WordPiece tokens
+TOKEN_PATTERN = re.compile(r"\w{1,8}|[^\w\s]")
+# End of a sentence: terminal punctuation (plus closing quotes) before
+# whitespace, or a line break
+SENTENCE_BREAK = re.compile(r"([.!?…]+[\"')\]’”]*)\s+|[ \t]*\n\s*")
+
+
+class TextChunk(NamedTuple):
+    """A chunk of a document: text == document[start:end]"""
+    text: str
+    start: int
+    end: int
+    index: int
+    tokens: int
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload stream exceeds the allowed size"""
+
+
+class MalformedUploadError(Exception):
+    """Raised when a multipart upload body cannot be parsed"""
+
+
+def _decode_header(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+class MultipartFileReader:
+    """
+    One file part of a multipart/form-data body, read while the body arrives.
+
+    The request stream is fed to python-multipart only as far as read()
+    needs, so at most one read of file bytes plus one body chunk is held
+    in memory and a caller that stops reading stops the transfer.
+    Starlette's form parsing, by contrast, spools the whole body before
+    the endpoint runs.
+    """
+
+    def __init__(self, content_type: str, stream: AsyncIterator[bytes], field_name: str = "file"):
+        media_type, params = parse_options_header(content_type)
+        if media_type != b"multipart/form-data" or b"boundary" not in params:
+            raise MalformedUploadError("Expected a multipart/form-data body")
+
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self._stream = stream.__aiter__()
+        self._buffer = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_file = False
+        self._file_done = False
+        self._parser = multipart.MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    # Parser callbacks (synchronous, called from parser.write)
+
+    def _on_part_begin(self):
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if (
+            self.filename is None
+            and b"filename" in options
+            and _decode_header(options.get(b"name", b"")) == self.field_name
+        ):
+            self.filename = _decode_header(options[b"filename"])
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._buffer += data[start:end]
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+    async def _pull(self) -> bool:
+        """Feed the next body chunk to the parser; False once the body has ended"""
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            return False
+        try:
+            self._parser.write(chunk)
+        except FormParserError as e:
+            raise MalformedUploadError(f"Invalid multipart body: {e}")
+        return True
+
+    async def start(self) -> str:
+        """
+        Read the body up to the file part's headers
+
+        Returns:
+            The uploaded file's name
+
+        Raises:
+            MalformedUploadError: if the body has no such file part
+        """
+        while self.filename is None:
+            if not await self._pull():
+                raise MalformedUploadError(f"No '{self.field_name}' file in the upload")
+        return self.filename
+
+    async def read(self, size: int) -> bytes:
+        """Next file bytes, at most `size`; b"" once the file part has ended"""
+        while not self._file_done and len(self._buffer) < size:
+            if not await self._pull():
+                raise MalformedUploadError("Upload ended before the file was complete")
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
 
 
 class DocumentService:
@@ -74,6 +220,9 @@ class DocumentService:
         """
         Extract text from file based on its type
 
+        PDF and DOCX parsing is CPU-bound and runs in the extraction
+        process pool (timeout and memory cap per document).
+
         Args:
             file_path: Path to the file
             file_type: Type of file (pdf, docx, txt)
@@ -84,51 +233,137 @@ class DocumentService:
         file_type = file_type.lower()
 
         if file_type == "pdf":
-            return DocumentService.extract_text_from_pdf(file_path)
+            return await extraction_pool.run(DocumentService.extract_text_from_pdf, file_path)
         elif file_type == "docx":
-            return DocumentService.extract_text_from_docx(file_path)
+            return await extraction_pool.run(DocumentService.extract_text_from_docx, file_path)
         elif file_type == "txt":
             return await DocumentService.extract_text_from_txt(file_path)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
 
     @staticmethod
-    def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def _sentence_spans(text: str) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, tokens) of each sentence, surrounding whitespace excluded"""
+        start = len(text) - len(text.lstrip())
+        breaks = [(m.end(1) if m.group(1) else m.start(), m.end()) for m in SENTENCE_BREAK.finditer(text, start)]
+        breaks.append((len(text.rstrip()), len(text)))
+
+        for end, next_start in breaks:
+            if end > start:
+                yield start, end, len(TOKEN_PATTERN.findall(text, start, end))
+            start = max(start, next_start)
+
+    @staticmethod
+    def _split_span(text: str, start: int, end: int, budget: int, unit: str) -> Iterator[Tuple[int, int, int]]:
+        """Cut a sentence over budget into pieces at token boundaries"""
+        piece_start, piece_end, tokens = start, start, 0
+        for token in TOKEN_PATTERN.finditer(text, start, end):
+            size = tokens + 1 if unit == "tokens" else token.end() - piece_start
+            if size > budget and tokens:
+                yield piece_start, piece_end, tokens
+                piece_start, tokens = token.start(), 0
+            piece_end = token.end()
+            tokens += 1
+        if tokens:
+            yield piece_start, piece_end, tokens
+
+    @staticmethod
+    def iter_chunks(text: str, budget: int, overlap: int = 0, unit: str = "tokens") -> Iterator[TextChunk]:
         """
-        Split text into overlapping chunks
+        Split text into overlapping chunks of whole sentences
+
+        Sentences are packed greedily until the budget is reached; the next
+        chunk starts with the trailing sentences of the previous one that
+        fit in the overlap. Sentences longer than the budget are cut at
+        token boundaries. Runs in one pass over the text, and each chunk
+        is sliced from the document once.
 
         Args:
             text: Text to chunk
-            chunk_size: Size of each chunk in characters
-            overlap: Overlap between chunks
+            budget: Maximum size of a chunk
+            overlap: Maximum size repeated from the end of the previous chunk
+            unit: "tokens" (approximate model tokens) or "chars"
 
-        Returns:
-            List of text chunks
+        Yields:
+            TextChunk objects carrying their character offsets in text
         """
-        if len(text) <= chunk_size:
-            return [text]
+        spans: List[Tuple[int, int, int]] = []
+        for start, end, tokens in DocumentService._sentence_spans(text):
+            size = tokens if unit == "tokens" else end - start
+            if size > budget:
+                spans.extend(DocumentService._split_span(text, start, end, budget, unit))
+            else:
+                spans.append((start, end, tokens))
+
+        token_sums = [0]
+        for _, _, tokens in spans:
+            token_sums.append(token_sums[-1] + tokens)
 
-        chunks = []
-        start = 0
+        def size_of(first: int, stop: int) -> int:
+            if unit == "tokens":
+                return token_sums[stop] - token_sums[first]
+            return spans[stop - 1][1] - spans[first][0]
 
-        while start < len(text):
-            end = start + chunk_size
-            chunk = text[start:end]
+        first, index = 0, 0
+        while first < len(spans):
+            stop = first + 1
+            while stop < len(spans) and size_of(first, stop + 1) <= budget:
+                stop += 1
 
-            # Try to break at sentence boundaries
-            if end < len(text):
-                last_period = chunk.rfind(".")
-                last_newline = chunk.rfind("\n")
-                break_point = max(last_period, last_newline)
+            start, end = spans[first][0], spans[stop - 1][1]
+            yield TextChunk(text[start:end], start, end, index, token_sums[stop] - token_sums[first])
+            index += 1
+            if stop == len(spans):
+                break
 
-                if break_point > chunk_size * 0.5:  # Only break if it's not too short
-                    chunk = text[start:start + break_point + 1]
-                    end = start + break_point + 1
+            # Repeat trailing sentences only while the next sentence still fits after them
+            next_first = stop
+            while (
+                next_first - 1 > first
+                and size_of(next_first - 1, stop) <= overlap
+                and size_of(next_first - 1, stop + 1) <= budget
+            ):
+                next_first -= 1
+            first = next_first
 
-            chunks.append(chunk.strip())
-            start = end - overlap
+    @staticmethod
+    async def save_upload(upload, destination: Path, max_size: int, chunk_size: int) -> Tuple[int, str]:
+        """
+        Stream an upload to disk in fixed-size chunks
+
+        The bytes go to a hidden temp file next to the destination, hashed as
+        they arrive, and the file is renamed into place only once complete.
+
+        Args:
+            upload: Object with an async read(size) method (e.g. MultipartFileReader)
+            destination: Final path of the file
+            max_size: Maximum size in bytes
+            chunk_size: Bytes read per chunk
+
+        Returns:
+            (file size in bytes, SHA-256 hex digest)
+
+        Raises:
+            UploadTooLargeError: as soon as more than max_size bytes arrive
+        """
+        tmp_path = destination.with_name(f".{destination.name}.part")
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                while chunk := await upload.read(chunk_size):
+                    size += len(chunk)
+                    if size > max_size:
+                        raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
+                    digest.update(chunk)
+                    await f.write(chunk)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
-        return chunks
+        return size, digest.hexdigest()
 
     @staticmethod
     def generate_document_id() -> str:
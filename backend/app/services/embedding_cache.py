@@ -0,0 +1,223 @@
+"""
+Content-addressed embedding cache - avoids re-embedding identical text
+Two tiers: in-memory LRU + on-disk SQLite table next to the vector DB
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+# Bumped whenever cached vectors stop matching what Ollama returns (stored as
+# SQLite user_version; an older disk tier is emptied on open).
+# 2: every embedding comes from /api/embed (L2-normalized)
+CACHE_FORMAT_VERSION = 2
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (embedding model, normalized text hash).
+
+    - Memory tier: LRU of the most recently used vectors
+    - Disk tier: SQLite table, evicts least recently used rows past a size limit
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = None,
+        max_disk_entries: int = None
+    ):
+        self.db_path = db_path or os.path.join(settings.CHROMA_PERSIST_DIR, "embedding_cache.sqlite")
+        self.max_memory_entries = max_memory_entries or settings.EMBEDDING_CACHE_MEMORY_ENTRIES
+        self.max_disk_entries = max_disk_entries or settings.EMBEDDING_CACHE_DISK_ENTRIES
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._disk_count = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------------------- Keys ----------------------
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different inputs share a cache entry"""
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    @classmethod
+    def make_key(cls, model: str, text: str) -> str:
+        """Cache key: embedding model + SHA-256 of the normalized text"""
+        digest = hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    # ---------------------- Disk tier (blocking, run in a thread) ----------------------
+
+    def _open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+            )
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_FORMAT_VERSION:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.execute(f"PRAGMA user_version = {CACHE_FORMAT_VERSION}")
+                self._conn.commit()
+            self._disk_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self._conn
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        with self._lock:
+            conn = self._open()
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            if rows:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows]
+                )
+                conn.commit()
+        return {key: array("f", blob).tolist() for key, blob in rows}
+
+    def _disk_put_many(self, items: List[Tuple[str, List[float]]]):
+        if not items:
+            return
+        with self._lock:
+            conn = self._open()
+            now = time.time()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items]
+            )
+            self._disk_count += conn.total_changes - before
+
+            overflow = self._disk_count - self.max_disk_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._disk_count -= overflow
+                self.evictions += overflow
+            conn.commit()
+
+    def _disk_clear(self):
+        with self._lock:
+            conn = self._open()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            self._disk_count = 0
+
+    # ---------------------- Memory tier ----------------------
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # ---------------------- Public API ----------------------
+
+    async def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached embeddings
+
+        Returns:
+            One vector per text, or None where the text is not cached
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [self._memory_get(key) for key in keys]
+        self.memory_hits += sum(1 for vector in results if vector is not None)
+
+        missing = list({key for key, vector in zip(keys, results) if vector is None})
+        if missing:
+            try:
+                found = await asyncio.to_thread(self._disk_get_many, missing)
+            except Exception as e:
+                print(f"Embedding cache read error: {e}")
+                found = {}
+
+            for i, key in enumerate(keys):
+                if results[i] is None and key in found:
+                    results[i] = found[key]
+                    self._memory_put(key, found[key])
+                    self.disk_hits += 1
+
+        self.misses += sum(1 for vector in results if vector is None)
+        return results
+
+    async def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store embeddings in both tiers"""
+        items = [
+            (self.make_key(model, text), vector)
+            for text, vector in zip(texts, vectors)
+            if vector
+        ]
+        for key, vector in items:
+            self._memory_put(key, vector)
+        try:
+            await asyncio.to_thread(self._disk_put_many, items)
+        except Exception as e:
+            print(f"Embedding cache write error: {e}")
+
+    async def clear(self):
+        """Drop every cached embedding"""
+        self._memory.clear()
+        await asyncio.to_thread(self._disk_clear)
+
+    def close(self):
+        """Close the on-disk tier"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+            "disk_entries": self._disk_count,
+            "max_disk_entries": self.max_disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+# Singleton instance
+embedding_cache = EmbeddingCache()
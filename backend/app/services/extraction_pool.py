@@ -0,0 +1,143 @@
+"""
+Process pool for CPU-bound document extraction (PDF, DOCX)
+Keeps parsing off the event loop, with a per-document timeout and memory cap
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+
+
+def _limit_worker_memory(memory_limit_mb: int):
+    """Worker initializer: cap the address space so runaway parsing raises MemoryError"""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Could not cap extraction worker memory: {e}")
+
+
+class ExtractionPool:
+    """
+    Bounded process pool for blocking extraction work.
+
+    - At most `max_workers` documents are parsed at once; further callers
+      wait their turn, and the timeout only counts time spent running
+    - A document running past the timeout gets its worker killed: the pool
+      is torn down and replaced, and documents that were running beside it
+      are retried once on the new pool
+    - Workers are spawned (not forked) with an address-space cap and are
+      recycled after EXTRACTION_MAX_TASKS_PER_WORKER documents
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None
+    ):
+        self.max_workers = max_workers or settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.timeout = timeout or settings.EXTRACTION_TIMEOUT
+        self.memory_limit_mb = (
+            memory_limit_mb if memory_limit_mb is not None else settings.EXTRACTION_MEMORY_LIMIT_MB
+        )
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.restarts = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory,
+                initargs=(self.memory_limit_mb,),
+                max_tasks_per_child=settings.EXTRACTION_MAX_TASKS_PER_WORKER or None
+            )
+        return self._pool
+
+    def _kill_pool(self, pool: ProcessPoolExecutor):
+        """Kill every worker of the pool (a stuck task cannot be cancelled otherwise)"""
+        if self._pool is pool:
+            self._pool = None
+            self.restarts += 1
+        for process in list((pool._processes or {}).values()):
+            if process.is_alive():
+                process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_once(self, fn: Callable, args: tuple) -> Any:
+        pool = self._get_pool()
+        future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._kill_pool(pool)
+            raise Exception(f"Extraction timed out after {self.timeout:.0f}s")
+        except BrokenProcessPool:
+            if self._pool is pool:
+                self._kill_pool(pool)  # A worker died: start the next call on a fresh pool
+            raise
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in a worker process
+
+        fn must be picklable (a module-level function or static method).
+
+        Raises:
+            Exception: on timeout, or when the worker died (e.g. memory cap)
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        async with self._slots:
+            try:
+                try:
+                    result = await self._run_once(fn, args)
+                except BrokenProcessPool:
+                    # Killed alongside another document's timeout: retry once
+                    result = await self._run_once(fn, args)
+            except BrokenProcessPool:
+                self.failed += 1
+                raise Exception("Extraction worker crashed (memory limit exceeded?)")
+            except Exception:
+                self.failed += 1
+                raise
+
+        self.completed += 1
+        return result
+
+    def close(self):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get_stats(self) -> Dict:
+        """Pool size, limits and outcome counters"""
+        return {
+            "max_workers": self.max_workers,
+            "timeout_s": self.timeout,
+            "memory_limit_mb": self.memory_limit_mb,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "restarts": self.restarts
+        }
+
+
+# Singleton instance
+extraction_pool = ExtractionPool()
@@ -0,0 +1,188 @@
+"""
+Priority-aware inference scheduler in front of Ollama
+Limits concurrent calls per call type and serves interactive work before bulk work
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, Optional
+from app.core.config import settings
+
+
+class Priority(IntEnum):
+    """Scheduling lanes - lower value is served first"""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+# Priority of the Ollama calls made by the current task (interactive unless marked bulk)
+current_priority: ContextVar[Priority] = ContextVar("inference_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def inference_priority(priority: Priority):
+    """Run every Ollama call made inside the block at the given priority"""
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class OllamaOverloadedError(Exception):
+    """Raised when a call cannot be queued (429) or waited too long in the queue (503)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Lane:
+    """Concurrency limit, priority queues and metrics for one call type"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.waiters: Dict[Priority, Deque[asyncio.Future]] = {p: deque() for p in Priority}
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+        self.avg_service_time = 1.0  # seconds, exponential moving average
+
+    def queued(self, priority: Optional[Priority] = None) -> int:
+        if priority is not None:
+            return sum(1 for f in self.waiters[priority] if not f.done())
+        return sum(self.queued(p) for p in Priority)
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up for a new caller"""
+        return max(1, math.ceil(self.avg_service_time * (self.queued() + 1) / self.limit))
+
+    def release(self):
+        """Hand the slot to the next waiter by priority, or free it"""
+        for priority in Priority:
+            queue = self.waiters[priority]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.in_flight -= 1
+
+    def record_service_time(self, seconds: float):
+        self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * seconds
+
+    def get_stats(self) -> Dict:
+        waits = sorted(self.recent_waits)
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": {p.name.lower(): self.queued(p) for p in Priority},
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_wait_ms": {
+                "avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "max": round(1000 * waits[-1], 1) if waits else 0.0
+            },
+            "avg_service_time_s": round(self.avg_service_time, 3)
+        }
+
+
+class InferenceScheduler:
+    """
+    Admission control for Ollama calls.
+
+    - One concurrency limit per call type (embed, chat, analyze)
+    - Interactive callers are always dequeued before bulk callers
+    - Bounded queues: a full queue rejects with 429, an interactive caller
+      waiting longer than OLLAMA_INTERACTIVE_QUEUE_TIMEOUT gets 503
+    """
+
+    def __init__(self):
+        self.lanes: Dict[str, _Lane] = {
+            "embed": _Lane("embed", settings.OLLAMA_EMBED_CONCURRENCY),
+            "chat": _Lane("chat", settings.OLLAMA_CHAT_CONCURRENCY),
+            "analyze": _Lane("analyze", settings.OLLAMA_ANALYZE_CONCURRENCY),
+        }
+        self.max_queue = {
+            Priority.INTERACTIVE: settings.OLLAMA_MAX_QUEUE_INTERACTIVE,
+            Priority.BULK: settings.OLLAMA_MAX_QUEUE_BULK,
+        }
+        self.queue_timeout = {
+            Priority.INTERACTIVE: settings.OLLAMA_INTERACTIVE_QUEUE_TIMEOUT,
+            Priority.BULK: None,  # Background work waits as long as it takes
+        }
+
+    async def _acquire(self, lane: _Lane, priority: Priority):
+        """Take a slot in the lane, queueing by priority if it is full"""
+        if lane.in_flight < lane.limit and lane.queued() == 0:
+            lane.in_flight += 1
+            lane.admitted += 1
+            lane.recent_waits.append(0.0)
+            return
+
+        if lane.queued(priority) >= self.max_queue[priority]:
+            lane.rejected += 1
+            raise OllamaOverloadedError(
+                429,
+                f"Too many queued {lane.name} requests, retry later",
+                lane.retry_after()
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters[priority].append(waiter)
+        started = time.monotonic()
+
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout[priority])
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                lane.release()  # Slot was handed over just as we were cancelled
+            else:
+                waiter.cancel()
+            raise
+
+        if not done:
+            waiter.cancel()
+            lane.timed_out += 1
+            raise OllamaOverloadedError(
+                503,
+                f"Ollama is busy ({lane.name} queue wait exceeded), retry later",
+                lane.retry_after()
+            )
+
+        lane.admitted += 1
+        lane.recent_waits.append(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def slot(self, call_type: str, priority: Optional[Priority] = None) -> AsyncIterator[None]:
+        """
+        Hold one slot of the given call type for the duration of the block
+
+        Args:
+            call_type: "embed", "chat" or "analyze"
+            priority: Scheduling lane (defaults to the current task's priority)
+        """
+        lane = self.lanes[call_type]
+        await self._acquire(lane, priority if priority is not None else current_priority.get())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            lane.record_service_time(time.monotonic() - started)
+            lane.release()
+
+    def get_stats(self) -> Dict:
+        """Per call type concurrency, queue depth and queue wait metrics"""
+        return {name: lane.get_stats() for name, lane in self.lanes.items()}
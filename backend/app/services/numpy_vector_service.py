@@ -0,0 +1,380 @@
+"""
+In-memory vector store backed by a NumPy matrix
+For small corpora, tests and benchmarks - nothing is persisted
+"""
+import asyncio
+import math
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import Counter, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_backend import SEARCH_MODES, reciprocal_rank_fusion
+
+METADATA_COLUMNS = ("text", "document_id", "filename", "chunk_index", "start_offset", "end_offset")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, accent-folded word tokens (same idea as the Lance FTS tokenizer)"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return re.findall(r"\w+", folded)
+
+
+class _Snapshot(NamedTuple):
+    """Immutable view of the store used by searches"""
+    matrix: np.ndarray  # (rows, dim) float32
+    sq_norms: np.ndarray  # squared L2 norm of each row
+    ids: List[str]
+    columns: Dict[str, np.ndarray]  # metadata column -> object array
+    postings: Dict[str, Dict[int, int]]  # token -> {row: term frequency}
+    lengths: np.ndarray  # tokens per row
+    avg_length: float
+
+
+class NumpyVectorService:
+    """
+    Vector store keeping every embedding in one in-memory NumPy matrix.
+
+    - Exact search: squared L2 distances for all rows in one matrix
+      product, then argpartition for the top-k (same scores as LanceDB)
+    - search_many scores a whole query matrix at once
+    - Keyword search is a small BM25 over an in-memory inverted index
+    """
+
+    def __init__(self):
+        self._documents: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._writes = 0
+        self._search_latencies: Dict[str, deque] = {
+            mode: deque(maxlen=1000) for mode in SEARCH_MODES + ("batch",)
+        }
+
+    # ---------------------- Snapshot ----------------------
+
+    def _build_snapshot(self) -> _Snapshot:
+        ids, vectors, lengths = [], [], []
+        columns = {name: [] for name in METADATA_COLUMNS}
+        postings: Dict[str, Dict[int, int]] = {}
+
+        for document_id, document in self._documents.items():
+            for i, (text, (start, end)) in enumerate(zip(document["texts"], document["offsets"])):
+                row = len(ids)
+                ids.append(f"{document_id}_chunk_{i}")
+                columns["text"].append(text)
+                columns["document_id"].append(document_id)
+                columns["filename"].append(document["filename"])
+                columns["chunk_index"].append(i)
+                columns["start_offset"].append(start)
+                columns["end_offset"].append(end)
+                tokens = tokenize(text)
+                lengths.append(len(tokens))
+                for token, count in Counter(tokens).items():
+                    postings.setdefault(token, {})[row] = count
+            vectors.append(document["vectors"])
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        lengths_array = np.asarray(lengths, dtype=np.float32)
+        return _Snapshot(
+            matrix=matrix,
+            sq_norms=np.einsum("ij,ij->i", matrix, matrix),
+            ids=ids,
+            columns={name: np.asarray(values, dtype=object) for name, values in columns.items()},
+            postings=postings,
+            lengths=lengths_array,
+            avg_length=float(lengths_array.mean()) if len(lengths) else 0.0,
+        )
+
+    def _current(self) -> _Snapshot:
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    # ---------------------- Helpers ----------------------
+
+    @staticmethod
+    def _mask(snapshot: _Snapshot, filter: Optional[Dict], exclude: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean row mask for equality filters and exclusions (None = all rows)"""
+        mask = None
+        for values, keep in ((filter, True), (exclude, False)):
+            for column, value in (values or {}).items():
+                if column not in snapshot.columns or value in (None, [], ()):
+                    continue
+                wanted = value if isinstance(value, (list, tuple)) else [value]
+                hit = np.isin(snapshot.columns[column], wanted)
+                hit = hit if keep else ~hit
+                mask = hit if mask is None else mask & hit
+        return mask
+
+    @staticmethod
+    def _result(snapshot: _Snapshot, row: int, score: float) -> Dict:
+        return {
+            "id": snapshot.ids[row],
+            "metadata": {name: snapshot.columns[name][row] for name in METADATA_COLUMNS},
+            "score": score,
+        }
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, top_k: int, largest: bool) -> np.ndarray:
+        """Indices of the top_k best values, best first"""
+        keyed = -scores if largest else scores
+        if top_k < len(keyed):
+            candidates = np.argpartition(keyed, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(keyed))
+        return candidates[np.argsort(keyed[candidates], kind="stable")]
+
+    def _distances(self, snapshot: _Snapshot, queries: np.ndarray) -> np.ndarray:
+        """Squared L2 distances, shape (queries, rows)"""
+        q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        distances = q_norms + snapshot.sq_norms[None, :] - 2.0 * (queries @ snapshot.matrix.T)
+        return np.maximum(distances, 0.0)
+
+    def _vector_query_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int,
+        filter: Optional[Dict],
+        exclude: Optional[Dict],
+        max_distance: Optional[float] = None
+    ) -> List[List[Dict]]:
+        snapshot = self._current()
+        if not snapshot.ids:
+            return [[] for _ in query_embeddings]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        distances = self._distances(snapshot, queries)
+        mask = self._mask(snapshot, filter, exclude)
+        if mask is not None:
+            distances[:, ~mask] = np.inf
+        if max_distance is not None:
+            distances[distances > max_distance] = np.inf
+
+        results = []
+        for row_distances in distances:
+            rows = self._top_k(row_distances, top_k, largest=False)
+            results.append([
+                self._result(snapshot, row, 1.0 / (1.0 + float(row_distances[row])))
+                for row in rows if np.isfinite(row_distances[row])
+            ])
+        return results
+
+    def _keyword_query(
+        self,
+        query_text: str,
+        top_k: int,
+        filter: Optional[Dict],
+        exclude: Optional[Dict]
+    ) -> List[Dict]:
+        """BM25 (k1=1.2, b=0.75); scores divided by the best hit like the Lance backend"""
+        snapshot = self._current()
+        num_rows = len(snapshot.ids)
+        if num_rows == 0:
+            return []
+
+        k1, b = 1.2, 0.75
+        scores = np.zeros(num_rows, dtype=np.float64)
+        norm = k1 * (1 - b + b * snapshot.lengths / (snapshot.avg_length or 1.0))
+        for token in set(tokenize(query_text)):
+            rows_tf = snapshot.postings.get(token)
+            if not rows_tf:
+                continue
+            idf = math.log(1 + (num_rows - len(rows_tf) + 0.5) / (len(rows_tf) + 0.5))
+            rows = np.fromiter(rows_tf.keys(), dtype=np.int64)
+            tf = np.fromiter(rows_tf.values(), dtype=np.float64)
+            scores[rows] += idf * tf * (k1 + 1) / (tf + norm[rows])
+
+        mask = self._mask(snapshot, filter, exclude)
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        rows = [row for row in self._top_k(scores, top_k, largest=True) if scores[row] > 0]
+        best = scores[rows[0]] if rows else 1.0
+        return [self._result(snapshot, row, float(scores[row] / best)) for row in rows]
+
+    def _record_latency(self, mode: str, started: float):
+        self._search_latencies[mode].append(time.monotonic() - started)
+
+    # ---------------------- Public API ----------------------
+
+    async def upsert_document(
+        self,
+        document_id: str,
+        text_chunks: List[str],
+        embeddings: List[List[float]],
+        metadata: Dict,
+        chunk_offsets: Optional[List[Tuple[int, int]]] = None
+    ) -> bool:
+        """Insert or replace all chunks of a document"""
+        count = min(len(text_chunks), len(embeddings))
+        if count == 0:
+            return True
+        with self._lock:
+            self._documents[document_id] = {
+                "texts": list(text_chunks[:count]),
+                "offsets": list(chunk_offsets[:count]) if chunk_offsets else [(None, None)] * count,
+                "filename": metadata.get("filename", ""),
+                "vectors": np.asarray(embeddings[:count], dtype=np.float32),
+            }
+            self._snapshot = None
+            self._writes += 1
+        return True
+
+    async def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None,
+        exclude: Optional[Dict] = None,
+        max_distance: Optional[float] = None
+    ) -> List[Dict]:
+        """Exact search (ANN parameters are accepted and ignored)"""
+        started = time.monotonic()
+        results = await asyncio.to_thread(
+            self._vector_query_many, [query_embedding], top_k, filter, exclude, max_distance
+        )
+        self._record_latency("vector", started)
+        return results[0]
+
+    async def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """Score every query against every row in one matrix product"""
+        if not query_embeddings:
+            return []
+        started = time.monotonic()
+        results = await asyncio.to_thread(
+            self._vector_query_many, query_embeddings, top_k, filter, exclude
+        )
+        self._record_latency("batch", started)
+        return results
+
+    async def keyword_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None
+    ) -> List[Dict]:
+        """BM25 full-text search"""
+        started = time.monotonic()
+        results = await asyncio.to_thread(self._keyword_query, query_text, top_k, filter, exclude)
+        self._record_latency("keyword", started)
+        return results
+
+    async def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[Dict]:
+        """BM25 + vector candidates merged by reciprocal rank fusion"""
+        candidates = top_k * settings.SEARCH_HYBRID_CANDIDATES
+        started = time.monotonic()
+        vector_results, keyword_results = await asyncio.gather(
+            asyncio.to_thread(self._vector_query_many, [query_embedding], candidates, filter, exclude),
+            asyncio.to_thread(self._keyword_query, query_text, candidates, filter, exclude)
+        )
+        results = reciprocal_rank_fusion(
+            [vector_results[0], keyword_results], top_k, k=settings.SEARCH_RRF_K
+        )
+        self._record_latency("hybrid", started)
+        return results
+
+    async def get_document_chunks(self, document_id: str, include_vector: bool = False) -> List[Dict]:
+        """All chunks of a document, ordered by chunk_index"""
+        document = self._documents.get(document_id)
+        if document is None:
+            return []
+        chunks = []
+        for i, (text, (start, end)) in enumerate(zip(document["texts"], document["offsets"])):
+            chunk = {
+                "id": f"{document_id}_chunk_{i}",
+                "metadata": {
+                    "text": text,
+                    "document_id": document_id,
+                    "filename": document["filename"],
+                    "chunk_index": i,
+                    "start_offset": start,
+                    "end_offset": end,
+                }
+            }
+            if include_vector:
+                chunk["vector"] = document["vectors"][i].tolist()
+            chunks.append(chunk)
+        return chunks
+
+    async def delete_document(self, document_id: str) -> bool:
+        """Remove every chunk of a document"""
+        with self._lock:
+            if self._documents.pop(document_id, None) is not None:
+                self._snapshot = None
+                self._writes += 1
+        return True
+
+    async def get_table_version(self) -> str:
+        """Write counter, scoped to this process since nothing is persisted"""
+        return f"numpy-{self._instance_id}-{self._writes}"
+
+    async def get_stats(self) -> Dict:
+        """Row count, matrix size and per-mode latency"""
+        snapshot = self._current()
+        latency = {}
+        for mode, samples in self._search_latencies.items():
+            ordered = sorted(samples)
+            latency[mode] = {
+                "count": len(ordered),
+                "p50": round(1000 * ordered[int(0.5 * (len(ordered) - 1))], 2) if ordered else 0.0,
+                "p95": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 2) if ordered else 0.0,
+            }
+        return {
+            "backend": "numpy",
+            "total_vectors": len(snapshot.ids),
+            "total_documents": len(self._documents),
+            "vector_format": {
+                "dim": snapshot.matrix.shape[1] if snapshot.ids else None,
+                "type": "float",
+                "raw_vector_bytes": int(snapshot.matrix.nbytes),
+            },
+            "search_latency_ms": latency,
+        }
+
+    def start_maintenance(self):
+        """Nothing to maintain in memory"""
+
+    async def stop_maintenance(self):
+        """Nothing to maintain in memory"""
+
+    def close(self):
+        """Drop the in-memory data"""
+        with self._lock:
+            self._documents.clear()
+            self._snapshot = None
+
+
+# Singleton instance
+numpy_vector_service = NumpyVectorService()
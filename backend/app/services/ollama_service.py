@@ -2,10 +2,20 @@
 Ollama service for local AI inference - No API keys required!
 Uses local models for bias detection and embeddings
 """
+import asyncio
+import hashlib
 import httpx
 import json
-from typing import List, Optional
+import re
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
 from app.core.config import settings
+from app.models.schemas import BiasAnalysisOutput, inline_json_schema
+from app.services.embedding_cache import embedding_cache
+from app.services.document_service import document_service
+from app.services.inference_scheduler import InferenceScheduler, OllamaOverloadedError
+from app.services.single_flight import SingleFlight
 
 
 class OllamaService:
@@ -17,71 +27,221 @@ class OllamaService:
     - nomic-embed-text for embeddings (384 dimensions)
     """
 
+    # Bump whenever the analysis prompt or output handling changes, so cached
+    # analysis results produced by the old prompt are no longer reused
+    ANALYSIS_PROMPT_VERSION = "3"
+
+    # JSON schema the analysis output is constrained to (Ollama `format`)
+    ANALYSIS_SCHEMA = inline_json_schema(BiasAnalysisOutput.model_json_schema())
+
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
         self.embedding_model = settings.OLLAMA_EMBEDDING_MODEL
-        self.timeout = 120.0  # Longer timeout for local inference
+        self.timeout = settings.OLLAMA_READ_TIMEOUT  # Longer timeout for local inference
+        self.client: Optional[httpx.AsyncClient] = None
+        self.scheduler = InferenceScheduler()
+        self._generate_flights = SingleFlight()
+        self._embedding_flights = SingleFlight()
+        self._status_snapshot: Optional[dict] = None
+        self._status_checked_at = 0.0
+        self._status_poller: Optional[asyncio.Task] = None
+        self._analysis_output_stats = {
+            "responses": 0,
+            "valid_first_try": 0,
+            "valid_on_retry": 0,
+            "repaired": 0,
+            "retries": 0,
+            "parse_failures": 0
+        }
+
+    async def connect(self):
+        """Open the shared, pooled HTTP client used for every Ollama call"""
+        if self.client is not None and not self.client.is_closed:
+            return
+
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.OLLAMA_CONNECT_TIMEOUT,
+                read=settings.OLLAMA_READ_TIMEOUT,
+                write=settings.OLLAMA_WRITE_TIMEOUT,
+                pool=settings.OLLAMA_POOL_TIMEOUT
+            )
+        )
+
+    async def disconnect(self):
+        """Close the shared HTTP client and its pooled connections"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared client, opening it lazily outside the app lifespan"""
+        if self.client is None or self.client.is_closed:
+            await self.connect()
+        return self.client
+
+    def _request_timeout(self, read: float) -> httpx.Timeout:
+        """Pool timeouts with a per-call read timeout"""
+        return httpx.Timeout(
+            connect=settings.OLLAMA_CONNECT_TIMEOUT,
+            read=read,
+            write=settings.OLLAMA_WRITE_TIMEOUT,
+            pool=settings.OLLAMA_POOL_TIMEOUT
+        )
 
     async def _check_ollama_running(self) -> bool:
         """Check if Ollama is running"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/api/tags", timeout=5.0)
-                return response.status_code == 200
+            client = await self._get_client()
+            response = await client.get("/api/tags", timeout=self._request_timeout(5.0))
+            return response.status_code == 200
         except:
             return False
 
     async def _ensure_model_exists(self, model_name: str) -> bool:
         """Check if model is available, provide instructions if not"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/api/tags", timeout=10.0)
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    model_names = [m.get("name", "").split(":")[0] for m in models]
-                    return model_name.split(":")[0] in model_names
+            client = await self._get_client()
+            response = await client.get("/api/tags", timeout=self._request_timeout(10.0))
+            if response.status_code == 200:
+                models = response.json().get("models", [])
+                model_names = [m.get("name", "").split(":")[0] for m in models]
+                return model_name.split(":")[0] in model_names
         except:
             pass
         return False
 
-    async def generate(self, prompt: str, system: str = None) -> str:
+    async def generate(
+        self,
+        prompt: str,
+        system: str = None,
+        call_type: str = "chat",
+        format: Optional[dict] = None
+    ) -> str:
         """
         Generate text using Ollama
 
         Args:
             prompt: The user prompt
             system: Optional system prompt
+            call_type: Scheduler lane the call is counted against ("chat" or "analyze")
+            format: Optional JSON schema the response is constrained to
 
         Returns:
             Generated text response
         """
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "options": {
+                "temperature": 0.3,
+                "num_predict": 4096
+            }
+        }
+        if format:
+            payload["format"] = format
+
         try:
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
+            # Identical concurrent requests share a single Ollama call
+            return await self._generate_flights.do(
+                self._flight_key(payload),
+                lambda: self._chat(payload, call_type)
+            )
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/chat",
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.3,
-                            "num_predict": 4096
-                        }
-                    }
-                )
+        except OllamaOverloadedError:
+            raise
+        except httpx.ConnectError:
+            raise Exception(
+                "Ollama is not running! Please start it with: ollama serve\n"
+                f"Then pull the model: ollama pull {self.model}"
+            )
+        except Exception as e:
+            raise Exception(f"Error generating with Ollama: {str(e)}")
+
+    async def _chat(self, payload: dict, call_type: str) -> str:
+        """Send one non-streaming /api/chat request"""
+        client = await self._get_client()
+        async with self.scheduler.slot(call_type):
+            response = await client.post(
+                "/api/chat",
+                json=payload,
+                timeout=self._request_timeout(self.timeout)
+            )
+
+        if response.status_code == 200:
+            result = response.json()
+            return result.get("message", {}).get("content", "")
+        else:
+            raise Exception(f"Ollama error: {response.status_code}")
+
+    @staticmethod
+    def _flight_key(payload: dict) -> str:
+        """Coalescing key for an Ollama request payload"""
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    async def generate_stream(self, prompt: str, system: str = None) -> AsyncIterator[str]:
+        """
+        Generate text using Ollama, yielding tokens as they are produced
+
+        Args:
+            prompt: The user prompt
+            system: Optional system prompt
+
+        Yields:
+            Pieces of the generated response, in order
+        """
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
 
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get("message", {}).get("content", "")
-                else:
+        try:
+            client = await self._get_client()
+            async with self.scheduler.slot("chat"), client.stream(
+                "POST",
+                "/api/chat",
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "stream": True,
+                    "options": {
+                        "temperature": 0.3,
+                        "num_predict": 4096
+                    }
+                },
+                timeout=self._request_timeout(self.timeout)
+            ) as response:
+                if response.status_code != 200:
                     raise Exception(f"Ollama error: {response.status_code}")
 
+                # Ollama streams one JSON object per line
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(f"Ollama error: {chunk['error']}")
+                    content = chunk.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if chunk.get("done"):
+                        break
+
+        except OllamaOverloadedError:
+            raise
         except httpx.ConnectError:
             raise Exception(
                 "Ollama is not running! Please start it with: ollama serve\n"
@@ -90,13 +250,19 @@ class OllamaService:
         except Exception as e:
             raise Exception(f"Error generating with Ollama: {str(e)}")
 
-    async def analyze_bias(self, text: str, bias_types: List[str] = None) -> dict:
+    async def analyze_bias(
+        self,
+        text: str,
+        bias_types: List[str] = None,
+        context: Optional[str] = None
+    ) -> dict:
         """
         Analyze text for bias using local Ollama model
 
         Args:
             text: The text to analyze
             bias_types: Specific bias types to check for
+            context: Optional reference context from other documents (RAG)
 
         Returns:
             Dictionary with analysis results
@@ -131,75 +297,303 @@ You MUST respond ONLY with valid JSON in this exact format:
 
 If no bias found, return overall_score: 0 and empty bias_instances array."""
 
+        context_section = ""
+        if context:
+            context_section = f"""REFERENCE CONTEXT FROM OTHER DOCUMENTS (consider these patterns, do not report bias in them):
+{context}
+
+"""
+
         user_prompt = f"""Analyze this text for {bias_types_str} of bias. Return ONLY valid JSON:
 
-TEXT TO ANALYZE:
+{context_section}TEXT TO ANALYZE:
 {text[:6000]}
 
 JSON RESPONSE:"""
 
         try:
-            response = await self.generate(user_prompt, system_prompt)
-
-            # Try to extract JSON from response
-            response = response.strip()
-
-            # Find JSON in response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                result = json.loads(json_str)
-
-                # Validate and set defaults
-                result.setdefault("overall_score", 0.0)
-                result.setdefault("summary", "Analysis complete")
-                result.setdefault("bias_instances", [])
+            attempts = 1 + settings.ANALYSIS_JSON_MAX_RETRIES
+            for attempt in range(attempts):
+                if attempt > 0:
+                    self._analysis_output_stats["retries"] += 1
+
+                response = await self.generate(
+                    user_prompt,
+                    system_prompt,
+                    call_type="analyze",
+                    format=self.ANALYSIS_SCHEMA
+                )
+                result = self._parse_analysis_output(response, attempt)
 
-                return result
-            else:
-                return {
-                    "overall_score": 0.0,
-                    "summary": "Could not parse analysis results",
-                    "bias_instances": []
-                }
+                if result is not None:
+                    # Validate and set defaults
+                    result.setdefault("overall_score", 0.0)
+                    result.setdefault("summary", "Analysis complete")
+                    result.setdefault("bias_instances", [])
+                    return result
 
-        except json.JSONDecodeError:
+            self._analysis_output_stats["parse_failures"] += 1
             return {
                 "overall_score": 0.0,
                 "summary": "Analysis completed but response format was invalid",
                 "bias_instances": []
             }
+
+        except OllamaOverloadedError:
+            raise
         except Exception as e:
             raise Exception(f"Error analyzing bias: {str(e)}")
 
+    def _parse_analysis_output(self, response: str, attempt: int = 0) -> Optional[dict]:
+        """
+        Parse the model's JSON analysis
+
+        Schema-constrained output normally parses as-is; otherwise a bounded
+        repair (code fences, surrounding prose, trailing commas) is tried.
+
+        Args:
+            response: Raw model output
+            attempt: 0 for the first generation, then 1, 2... for retries
+
+        Returns:
+            The parsed object, or None if the output is truly malformed
+        """
+        self._analysis_output_stats["responses"] += 1
+        response = response.strip()
+
+        try:
+            result = json.loads(response)
+            if isinstance(result, dict):
+                # Only the first generation counts as a first-try success
+                key = "valid_first_try" if attempt == 0 else "valid_on_retry"
+                self._analysis_output_stats[key] += 1
+                return result
+        except json.JSONDecodeError:
+            pass
+
+        start_idx = response.find('{')
+        end_idx = response.rfind('}') + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            return None
+
+        json_str = re.sub(r",\s*([}\]])", r"\1", response[start_idx:end_idx])
+        try:
+            result = json.loads(json_str)
+        except json.JSONDecodeError:
+            return None
+
+        if not isinstance(result, dict):
+            return None
+        self._analysis_output_stats["repaired"] += 1
+        return result
+
+    def get_analysis_output_stats(self) -> dict:
+        """Counters for structured analysis output parsing"""
+        return dict(self._analysis_output_stats)
+
+    async def analyze_document(
+        self,
+        text: str,
+        bias_types: List[str] = None,
+        context: Optional[str] = None
+    ) -> dict:
+        """Analyze a full document, chunked when ANALYSIS_CHUNKED_ENABLED is set"""
+        if settings.ANALYSIS_CHUNKED_ENABLED:
+            return await self.analyze_bias_chunked(text, bias_types, context)
+        return await self.analyze_bias(text, bias_types, context)
+
+    async def analyze_bias_chunked(
+        self,
+        text: str,
+        bias_types: List[str] = None,
+        context: Optional[str] = None
+    ) -> dict:
+        """
+        Analyze a whole document for bias, map-reduce style
+
+        The document is split with DocumentService.iter_chunks, chunks are
+        analyzed concurrently (at most ANALYSIS_MAX_WORKERS at a time), and
+        the per-chunk results are merged: instance positions are shifted to
+        document coordinates and overall_score is the length-weighted mean
+        of the chunk scores.
+
+        Args:
+            text: The full document text
+            bias_types: Specific bias types to check for
+            context: Optional reference context from other documents (RAG)
+
+        Returns:
+            Dictionary with merged analysis results
+        """
+        text_chunks = list(document_service.iter_chunks(
+            text,
+            settings.ANALYSIS_CHUNK_SIZE,
+            settings.ANALYSIS_CHUNK_OVERLAP,
+            unit="chars"
+        ))
+        chunks = [chunk.text for chunk in text_chunks]
+        offsets = [chunk.start for chunk in text_chunks]
+        if not chunks:
+            return await self.analyze_bias(text, bias_types, context)
+        semaphore = asyncio.Semaphore(settings.ANALYSIS_MAX_WORKERS)
+
+        async def analyze_chunk(chunk: str) -> dict:
+            async with semaphore:
+                return await self.analyze_bias(chunk, bias_types, context)
+
+        results = await asyncio.gather(
+            *(analyze_chunk(chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        failures = [r for r in results if isinstance(r, Exception)]
+        overloaded = [r for r in failures if isinstance(r, OllamaOverloadedError)]
+        if overloaded:
+            raise overloaded[0]
+        if len(failures) == len(results):
+            raise failures[0]
+
+        return self._merge_chunk_results(chunks, offsets, results)
+
+    @staticmethod
+    def _merge_chunk_results(
+        chunks: List[str],
+        offsets: List[int],
+        results: List
+    ) -> dict:
+        """Reduce per-chunk analyses into one document-level result"""
+        instances: List[Dict] = []
+        weighted_score = 0.0
+        analyzed_length = 0
+        chunk_summaries = []
+
+        for chunk, offset, result in zip(chunks, offsets, results):
+            if isinstance(result, Exception):
+                print(f"Error analyzing chunk at offset {offset}: {result}")
+                continue
+
+            score = float(result.get("overall_score", 0.0) or 0.0)
+            weighted_score += score * len(chunk)
+            analyzed_length += len(chunk)
+            if result.get("summary"):
+                chunk_summaries.append((score, result["summary"]))
+
+            for instance in result.get("bias_instances", []):
+                if not isinstance(instance, dict):
+                    continue
+                instance = dict(instance)
+                passage = instance.get("text", "")
+
+                # Prefer locating the quoted passage over the model's own offsets
+                local_start = chunk.find(passage) if passage else -1
+                if local_start == -1:
+                    try:
+                        local_start = min(max(int(instance.get("start_position", 0)), 0), len(chunk))
+                    except (TypeError, ValueError):
+                        local_start = 0
+                local_end = local_start + len(passage) if passage else local_start
+
+                instance["start_position"] = offset + local_start
+                instance["end_position"] = offset + min(local_end, len(chunk))
+                instances.append(instance)
+
+        # Chunks overlap: keep one instance per (type, passage) span
+        instances.sort(key=lambda i: (i["start_position"], -float(i.get("severity", 0) or 0)))
+        merged: List[Dict] = []
+        for instance in instances:
+            duplicate = next(
+                (
+                    kept for kept in merged
+                    if kept.get("type") == instance.get("type")
+                    and kept["start_position"] < instance["end_position"]
+                    and instance["start_position"] < kept["end_position"]
+                ),
+                None
+            )
+            if duplicate is None:
+                merged.append(instance)
+
+        chunk_summaries.sort(key=lambda item: item[0], reverse=True)
+        if len(chunks) == 1:
+            summary = chunk_summaries[0][1] if chunk_summaries else "Analysis complete"
+        else:
+            summary = f"Analyzed {len(chunks)} sections of the document. " + " ".join(
+                text for _, text in chunk_summaries[:3]
+            )
+
+        return {
+            "overall_score": round(weighted_score / analyzed_length, 3) if analyzed_length else 0.0,
+            "summary": summary.strip(),
+            "bias_instances": merged,
+            "chunk_metadata": {
+                "num_chunks": len(chunks),
+                "chunks_failed": sum(1 for r in results if isinstance(r, Exception))
+            }
+        }
+
     async def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding vector using Ollama
 
+        Identical text embedded with the same model is served from the
+        embedding cache when EMBEDDING_CACHE_ENABLED is set, and identical
+        concurrent calls are coalesced into one.
+
         Args:
             text: The text to embed
 
         Returns:
             List of floats representing the embedding vector
         """
+        text = text[:8000]
+
+        # Identical concurrent requests share a single lookup/Ollama call
+        return await self._embedding_flights.do(
+            self._flight_key({"model": self.embedding_model, "prompt": text}),
+            lambda: self._embed_cached(text)
+        )
+
+    async def _embed_cached(self, text: str) -> List[float]:
+        """Embed a single text through the embedding cache"""
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return await self._embed_uncached(text)
+
+        cached = (await embedding_cache.get_many(self.embedding_model, [text]))[0]
+        if cached is not None:
+            return cached
+
+        embedding = await self._embed_uncached(text)
+        if embedding:
+            await embedding_cache.put_many(self.embedding_model, [text], [embedding])
+        return embedding
+
+    async def _embed_uncached(self, text: str) -> List[float]:
+        """
+        Embed a single text with Ollama's /api/embed, bypassing the cache
+
+        Same endpoint as the batched path (L2-normalized vectors), so query
+        and document embeddings are comparable.
+        """
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            client = await self._get_client()
+            async with self.scheduler.slot("embed"):
                 response = await client.post(
-                    f"{self.base_url}/api/embeddings",
+                    "/api/embed",
                     json={
                         "model": self.embedding_model,
-                        "prompt": text[:8000]  # Limit text length
-                    }
+                        "input": [text[:8000]]  # Limit text length
+                    },
+                    timeout=self._request_timeout(60.0)
                 )
 
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get("embedding", [])
-                else:
-                    raise Exception(f"Embedding error: {response.status_code}")
+            if response.status_code == 200:
+                embeddings = response.json().get("embeddings", [])
+                return embeddings[0] if embeddings else []
+            else:
+                raise Exception(f"Embedding error: {response.status_code}")
 
+        except OllamaOverloadedError:
+            raise
         except httpx.ConnectError:
             raise Exception(
                 "Ollama is not running! Please start it with: ollama serve\n"
@@ -208,29 +602,154 @@ JSON RESPONSE:"""
         except Exception as e:
             raise Exception(f"Error generating embedding: {str(e)}")
 
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Generate embedding vectors for many texts using Ollama's batched /api/embed
+
+        Texts are sent in batches of `batch_size`, with at most
+        OLLAMA_EMBED_MAX_CONCURRENT_BATCHES batches in flight at once.
+        Identical concurrent calls are coalesced into one, like
+        generate_embedding; a single text shares generate_embedding's flight.
+
+        Args:
+            texts: The texts to embed
+            batch_size: Texts per request (defaults to OLLAMA_EMBED_BATCH_SIZE)
+
+        Returns:
+            One embedding vector per input text, in input order
+        """
+        if not texts:
+            return []
+
+        texts = [text[:8000] for text in texts]
+        if len(texts) == 1:
+            return [await self.generate_embedding(texts[0])]
+
+        # Identical concurrent requests share a single lookup/Ollama round
+        embeddings = await self._embedding_flights.do(
+            self._flight_key({"model": self.embedding_model, "input": texts}),
+            lambda: self._embed_many_cached(texts, batch_size)
+        )
+        return list(embeddings)
+
+    async def _embed_many_cached(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Embed many texts through the embedding cache"""
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return await self._embed_batches_uncached(texts, batch_size)
+
+        embeddings = await embedding_cache.get_many(self.embedding_model, texts)
+
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(
+            text for text, embedding in zip(texts, embeddings) if embedding is None
+        ))
+        if missing:
+            fresh = await self._embed_batches_uncached(missing, batch_size)
+            await embedding_cache.put_many(self.embedding_model, missing, fresh)
+            by_text = dict(zip(missing, fresh))
+            embeddings = [
+                embedding if embedding is not None else by_text[text]
+                for text, embedding in zip(texts, embeddings)
+            ]
+
+        return embeddings
+
+    async def _embed_batches_uncached(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Embed texts with batched /api/embed requests, bypassing the cache"""
+        batch_size = batch_size or settings.OLLAMA_EMBED_BATCH_SIZE
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        semaphore = asyncio.Semaphore(settings.OLLAMA_EMBED_MAX_CONCURRENT_BATCHES)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore, self.scheduler.slot("embed"):
+                client = await self._get_client()
+                response = await client.post(
+                    "/api/embed",
+                    json={
+                        "model": self.embedding_model,
+                        "input": [text[:8000] for text in batch]  # Limit text length
+                    },
+                    timeout=self._request_timeout(60.0 + 5.0 * len(batch))
+                )
+
+                if response.status_code != 200:
+                    raise Exception(f"Embedding error: {response.status_code}")
+
+                embeddings = response.json().get("embeddings", [])
+                if len(embeddings) != len(batch):
+                    raise Exception(
+                        f"Embedding count mismatch: sent {len(batch)}, got {len(embeddings)}"
+                    )
+                return embeddings
+
+        try:
+            results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+            return [embedding for batch_result in results for embedding in batch_result]
+
+        except OllamaOverloadedError:
+            raise
+        except httpx.ConnectError:
+            raise Exception(
+                "Ollama is not running! Please start it with: ollama serve\n"
+                f"Then pull the embedding model: ollama pull {self.embedding_model}"
+            )
+        except Exception as e:
+            raise Exception(f"Error generating embeddings: {str(e)}")
+
     async def generate_summary(self, text: str, max_length: int = 200) -> str:
         """Generate a summary of the text"""
         prompt = f"Summarize this text in {max_length} characters or less:\n\n{text[:3000]}"
         return await self.generate(prompt)
 
-    async def get_status(self) -> dict:
-        """Get Ollama service status"""
-        is_running = await self._check_ollama_running()
+    def get_coalescing_stats(self) -> dict:
+        """Calls made and upstream calls saved by request coalescing"""
+        return {
+            "generate": self._generate_flights.get_stats(),
+            "embedding": self._embedding_flights.get_stats()
+        }
 
-        if not is_running:
-            return {
-                "status": "offline",
-                "message": "Ollama is not running. Start with: ollama serve",
-                "models_available": []
-            }
+    async def get_status(self, fresh: bool = False) -> dict:
+        """
+        Get Ollama service status
+
+        Served from the snapshot kept by the status poller while it is
+        younger than OLLAMA_STATUS_TTL; `fresh=True` forces a live check.
+        """
+        snapshot_age = time.monotonic() - self._status_checked_at
+        if not fresh and self._status_snapshot is not None and snapshot_age < settings.OLLAMA_STATUS_TTL:
+            return self._status_snapshot
+
+        return await self.refresh_status()
 
+    async def refresh_status(self) -> dict:
+        """Check Ollama live (one /api/tags call) and update the status snapshot"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/api/tags", timeout=10.0)
+            client = await self._get_client()
+            response = await client.get("/api/tags", timeout=self._request_timeout(5.0))
+
+            if response.status_code != 200:
+                status = {
+                    "status": "error",
+                    "message": f"Ollama error: {response.status_code}",
+                    "models_available": []
+                }
+            else:
                 models = response.json().get("models", [])
                 model_names = [m.get("name", "") for m in models]
 
-                return {
+                status = {
                     "status": "online",
                     "message": "Ollama is running",
                     "models_available": model_names,
@@ -239,13 +758,45 @@ JSON RESPONSE:"""
                     "analysis_model_ready": any(self.model.split(":")[0] in m for m in model_names),
                     "embedding_model_ready": any(self.embedding_model.split(":")[0] in m for m in model_names)
                 }
+        except (httpx.ConnectError, httpx.TimeoutException):
+            status = {
+                "status": "offline",
+                "message": "Ollama is not running. Start with: ollama serve",
+                "models_available": []
+            }
         except Exception as e:
-            return {
+            status = {
                 "status": "error",
                 "message": str(e),
                 "models_available": []
             }
 
+        status["checked_at"] = datetime.utcnow().isoformat()
+        self._status_snapshot = status
+        self._status_checked_at = time.monotonic()
+        return status
+
+    async def _poll_status(self):
+        """Refresh the status snapshot every OLLAMA_STATUS_POLL_INTERVAL seconds"""
+        while True:
+            await self.refresh_status()
+            await asyncio.sleep(settings.OLLAMA_STATUS_POLL_INTERVAL)
+
+    def start_status_poller(self):
+        """Start the background status poller"""
+        if self._status_poller is None or self._status_poller.done():
+            self._status_poller = asyncio.create_task(self._poll_status())
+
+    async def stop_status_poller(self):
+        """Stop the background status poller"""
+        if self._status_poller is not None:
+            self._status_poller.cancel()
+            try:
+                await self._status_poller
+            except asyncio.CancelledError:
+                pass
+            self._status_poller = None
+
 
 # Singleton instance
 ollama_service = OllamaService()
@@ -1,9 +1,11 @@
 """
 Pinecone service for vector storage and semantic search
+The Pinecone client is blocking, so every call runs in a worker thread
 """
+import asyncio
 from pinecone import Pinecone, ServerlessSpec
 from app.core.config import settings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import uuid
 
 
@@ -13,6 +15,9 @@ class PineconeService:
     def __init__(self):
         self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
         self.index_name = settings.PINECONE_INDEX_NAME
+        self.dimension = settings.EMBEDDING_DIMENSION
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._writes = 0
         self._ensure_index_exists()
 
     def _ensure_index_exists(self):
@@ -21,10 +26,10 @@ class PineconeService:
             existing_indexes = [index.name for index in self.pc.list_indexes()]
 
             if self.index_name not in existing_indexes:
-                # Create index with text-embedding-3-small dimension (1536)
+                # Create index with the embedding model's dimension
                 self.pc.create_index(
                     name=self.index_name,
-                    dimension=1536,
+                    dimension=self.dimension,
                     metric="cosine",
                     spec=ServerlessSpec(
                         cloud="aws",
@@ -41,7 +46,8 @@ class PineconeService:
         document_id: str,
         text_chunks: List[str],
         embeddings: List[List[float]],
-        metadata: Dict
+        metadata: Dict,
+        chunk_offsets: Optional[List[Tuple[int, int]]] = None
     ) -> bool:
         """
         Store document chunks with their embeddings in Pinecone
@@ -51,6 +57,7 @@ class PineconeService:
             text_chunks: List of text chunks from the document
             embeddings: List of embedding vectors corresponding to chunks
             metadata: Metadata about the document
+            chunk_offsets: (start, end) of each chunk in the document text
 
         Returns:
             True if successful
@@ -59,33 +66,57 @@ class PineconeService:
             vectors = []
             for i, (chunk, embedding) in enumerate(zip(text_chunks, embeddings)):
                 vector_id = f"{document_id}_chunk_{i}"
+                chunk_metadata = {
+                    **metadata,
+                    "document_id": document_id,
+                    "chunk_index": i,
+                    "text": chunk
+                }
+                if chunk_offsets:
+                    # Pinecone metadata cannot hold nulls: offsets are only set when known
+                    chunk_metadata["start_offset"], chunk_metadata["end_offset"] = chunk_offsets[i]
                 vectors.append({
                     "id": vector_id,
                     "values": embedding,
-                    "metadata": {
-                        **metadata,
-                        "document_id": document_id,
-                        "chunk_index": i,
-                        "text": chunk
-                    }
+                    "metadata": chunk_metadata
                 })
 
-            # Upsert in batches of 100
-            batch_size = 100
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                self.index.upsert(vectors=batch)
+            def upsert_batches():
+                # Upsert in batches of 100
+                batch_size = 100
+                for i in range(0, len(vectors), batch_size):
+                    batch = vectors[i:i + batch_size]
+                    self.index.upsert(vectors=batch)
 
+            await asyncio.to_thread(upsert_batches)
+            self._writes += 1
             return True
 
         except Exception as e:
             raise Exception(f"Error upserting document to Pinecone: {str(e)}")
 
+    @staticmethod
+    def _build_filter(filter: Optional[Dict], exclude: Optional[Dict]) -> Optional[Dict]:
+        """Pinecone metadata filter from equality filters and exclusions"""
+        clauses = {}
+        for column, value in (filter or {}).items():
+            clauses[column] = {"$in": list(value)} if isinstance(value, (list, tuple)) else value
+        for column, value in (exclude or {}).items():
+            if value in (None, [], ()):
+                continue
+            clauses[column] = {"$nin": list(value)} if isinstance(value, (list, tuple)) else {"$ne": value}
+        return clauses or None
+
     async def search(
         self,
         query_embedding: List[float],
         top_k: int = 5,
-        filter: Optional[Dict] = None
+        filter: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None,
+        exclude: Optional[Dict] = None,
+        max_distance: Optional[float] = None
     ) -> List[Dict]:
         """
         Perform semantic search using query embedding
@@ -94,16 +125,20 @@ class PineconeService:
             query_embedding: Embedding vector of the search query
             top_k: Number of results to return
             filter: Optional metadata filter
+            nprobes, refine_factor, ef: LanceDB index parameters (ignored)
+            exclude: Metadata values to exclude
+            max_distance: Squared L2 cutoff; for unit vectors that is 2 - 2 * cosine
 
         Returns:
             List of search results with scores and metadata
         """
         try:
-            results = self.index.query(
+            results = await asyncio.to_thread(
+                self.index.query,
                 vector=query_embedding,
                 top_k=top_k,
                 include_metadata=True,
-                filter=filter
+                filter=self._build_filter(filter, exclude)
             )
 
             return [
@@ -113,12 +148,53 @@ class PineconeService:
                     "metadata": match.metadata
                 }
                 for match in results.matches
+                if max_distance is None or 2.0 - 2.0 * match.score <= max_distance
             ]
 
         except Exception as e:
             raise Exception(f"Error searching in Pinecone: {str(e)}")
 
-    async def get_document_chunks(self, document_id: str) -> List[Dict]:
+    async def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """Pinecone has no multi-vector query: run the queries concurrently"""
+        return list(await asyncio.gather(*(
+            self.search(embedding, top_k=top_k, filter=filter, exclude=exclude)
+            for embedding in query_embeddings
+        )))
+
+    async def keyword_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Not supported: the index only holds dense vectors"""
+        raise NotImplementedError("Keyword search is not available with the Pinecone backend")
+
+    async def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[Dict]:
+        """Not supported: the index only holds dense vectors"""
+        raise NotImplementedError("Hybrid search is not available with the Pinecone backend")
+
+    async def get_document_chunks(self, document_id: str, include_vector: bool = False) -> List[Dict]:
         """
         Retrieve all chunks for a specific document
 
@@ -130,20 +206,24 @@ class PineconeService:
         """
         try:
             # Query with a dummy vector, filtering by document_id
-            results = self.index.query(
-                vector=[0.0] * 1536,  # Dummy vector
+            results = await asyncio.to_thread(
+                self.index.query,
+                vector=[0.0] * self.dimension,  # Dummy vector
                 top_k=10000,  # Get all chunks
                 filter={"document_id": document_id},
-                include_metadata=True
+                include_metadata=True,
+                include_values=include_vector
             )
 
-            return [
+            chunks = [
                 {
                     "id": match.id,
-                    "metadata": match.metadata
+                    "metadata": match.metadata,
+                    **({"vector": match.values} if include_vector else {})
                 }
                 for match in results.matches
             ]
+            return sorted(chunks, key=lambda chunk: chunk["metadata"].get("chunk_index", 0))
 
         except Exception as e:
             raise Exception(f"Error retrieving document chunks: {str(e)}")
@@ -159,7 +239,8 @@ class PineconeService:
             True if successful
         """
         try:
-            self.index.delete(filter={"document_id": document_id})
+            await asyncio.to_thread(self.index.delete, filter={"document_id": document_id})
+            self._writes += 1
             return True
 
         except Exception as e:
@@ -173,10 +254,29 @@ class PineconeService:
             Dictionary with index stats
         """
         try:
-            return self.index.describe_index_stats()
+            stats = await asyncio.to_thread(self.index.describe_index_stats)
+            return {
+                "backend": "pinecone",
+                "index_name": self.index_name,
+                "total_vectors": stats.total_vector_count,
+                "dimension": stats.dimension,
+            }
         except Exception as e:
             raise Exception(f"Error getting Pinecone stats: {str(e)}")
 
+    async def get_table_version(self) -> str:
+        """Pinecone has no table version: count writes made by this process"""
+        return f"pinecone-{self._instance_id}-{self._writes}"
+
+    def start_maintenance(self):
+        """Pinecone is managed, nothing to maintain"""
+
+    async def stop_maintenance(self):
+        """Pinecone is managed, nothing to maintain"""
+
+    def close(self):
+        """Nothing to release"""
+
 
 # Singleton instance
 pinecone_service = PineconeService()
@@ -2,9 +2,11 @@
 RAG (Retrieval Augmented Generation) service for context-aware bias detection
 Uses Ollama (local) + ChromaDB (local) - No API keys needed!
 """
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from app.services.ollama_service import ollama_service
-from app.services.chroma_service import chroma_service
+from app.services.vector_backend import score_to_distance
+from app.services.vector_store import vector_service
+from app.services.inference_scheduler import OllamaOverloadedError
 from app.models.schemas import BiasType
 import json
 
@@ -48,33 +50,24 @@ class RAGService:
             if not query_embedding:
                 return []
 
-            # Search for similar content in ChromaDB
-            results = await chroma_service.search(
+            # Search for similar content in ChromaDB; the same-document
+            # exclusion and the relevance cutoff run inside Lance
+            results = await vector_service.search(
                 query_embedding=query_embedding,
-                top_k=top_k * 2  # Get more results to filter
+                top_k=top_k,
+                exclude={"document_id": exclude_document_id} if exclude_document_id else None,
+                max_distance=score_to_distance(self.context_relevance_threshold)
             )
 
-            # Filter out chunks from the same document
-            relevant_chunks = []
-            for result in results:
-                doc_id = result.get("metadata", {}).get("document_id", "")
-                score = result.get("score", 0)
-
-                # Skip if same document or low relevance
-                if exclude_document_id and doc_id == exclude_document_id:
-                    continue
-                if score < self.context_relevance_threshold:
-                    continue
-
-                relevant_chunks.append({
+            relevant_chunks = [
+                {
                     "text": result.get("metadata", {}).get("text", ""),
                     "filename": result.get("metadata", {}).get("filename", "Unknown"),
-                    "relevance_score": score,
-                    "document_id": doc_id
-                })
-
-                if len(relevant_chunks) >= top_k:
-                    break
+                    "relevance_score": result.get("score", 0),
+                    "document_id": result.get("metadata", {}).get("document_id", "")
+                }
+                for result in results
+            ]
 
             return relevant_chunks
 
@@ -129,26 +122,18 @@ class RAGService:
             except Exception as e:
                 print(f"Could not retrieve context: {e}")
 
-        bias_types_str = ", ".join([bt.value for bt in bias_types]) if bias_types else "all types"
-
-        # Build the analysis prompt
-        if context_prompt:
-            full_text = f"""REFERENCE CONTEXT FROM OTHER DOCUMENTS:
-{context_prompt}
-
-DOCUMENT TO ANALYZE:
-{text[:5000]}
-
-Analyze for {bias_types_str} of bias. Consider patterns from reference documents."""
-        else:
-            full_text = f"""DOCUMENT TO ANALYZE:
-{text[:5000]}
-
-Analyze for {bias_types_str} of bias."""
+        bias_type_values = [
+            bt.value if isinstance(bt, BiasType) else bt for bt in bias_types
+        ] if bias_types else None
 
         try:
-            # Use Ollama for analysis
-            result = await ollama_service.analyze_bias(full_text, bias_types_str.split(", ") if bias_types else None)
+            # Use Ollama for analysis of the whole document, with the
+            # retrieved references as shared context for every chunk
+            result = await ollama_service.analyze_document(
+                text,
+                bias_type_values,
+                context=context_prompt or None
+            )
 
             # Add RAG metadata
             result["rag_metadata"] = {
@@ -162,9 +147,73 @@ Analyze for {bias_types_str} of bias."""
 
             return result
 
+        except OllamaOverloadedError:
+            raise
         except Exception as e:
             raise Exception(f"Error in RAG analysis: {str(e)}")
 
+    async def _prepare_qa(
+        self,
+        question: str,
+        document_id: Optional[str] = None,
+        top_k: int = 5
+    ) -> Optional[Dict]:
+        """
+        Retrieve context for a question and build the Q&A prompts.
+
+        Returns:
+            Dict with sources, system_prompt and user_prompt, or None if
+            the question could not be embedded
+        """
+        # Generate embedding for the question
+        query_embedding = await ollama_service.generate_embedding(question)
+
+        if not query_embedding:
+            return None
+
+        # Build filter
+        filter_dict = {"document_id": document_id} if document_id else None
+
+        # Search in ChromaDB
+        results = await vector_service.search(
+            query_embedding=query_embedding,
+            top_k=top_k,
+            filter=filter_dict
+        )
+
+        # Build context from results
+        context_parts = []
+        sources = []
+        for result in results:
+            text = result.get("metadata", {}).get("text", "")
+            filename = result.get("metadata", {}).get("filename", "Unknown")
+            context_parts.append(f"From {filename}:\n{text}")
+            sources.append({
+                "filename": filename,
+                "document_id": result.get("metadata", {}).get("document_id"),
+                "start_offset": result.get("metadata", {}).get("start_offset"),
+                "end_offset": result.get("metadata", {}).get("end_offset"),
+                "relevance": result.get("score", 0)
+            })
+
+        context = "\n\n---\n\n".join(context_parts) if context_parts else "No relevant context found."
+
+        system_prompt = """You are a bias detection expert. Answer questions about bias patterns
+using the provided context. Be specific and helpful. If no relevant context is available, say so."""
+
+        user_prompt = f"""Context from analyzed documents:
+{context}
+
+Question: {question}
+
+Provide a helpful answer based on the context above."""
+
+        return {
+            "sources": sources,
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt
+        }
+
     async def semantic_qa(
         self,
         question: str,
@@ -183,10 +232,9 @@ Analyze for {bias_types_str} of bias."""
             Answer with supporting evidence
         """
         try:
-            # Generate embedding for the question
-            query_embedding = await ollama_service.generate_embedding(question)
+            prepared = await self._prepare_qa(question, document_id, top_k)
 
-            if not query_embedding:
+            if prepared is None:
                 return {
                     "question": question,
                     "answer": "Could not generate embedding for search.",
@@ -194,51 +242,59 @@ Analyze for {bias_types_str} of bias."""
                     "num_sources_used": 0
                 }
 
-            # Build filter
-            filter_dict = {"document_id": document_id} if document_id else None
-
-            # Search in ChromaDB
-            results = await chroma_service.search(
-                query_embedding=query_embedding,
-                top_k=top_k,
-                filter=filter_dict
+            # Generate answer using Ollama
+            answer = await ollama_service.generate(
+                prepared["user_prompt"],
+                prepared["system_prompt"]
             )
 
-            # Build context from results
-            context_parts = []
-            sources = []
-            for result in results:
-                text = result.get("metadata", {}).get("text", "")
-                filename = result.get("metadata", {}).get("filename", "Unknown")
-                context_parts.append(f"From {filename}:\n{text}")
-                sources.append({
-                    "filename": filename,
-                    "document_id": result.get("metadata", {}).get("document_id"),
-                    "relevance": result.get("score", 0)
-                })
-
-            context = "\n\n---\n\n".join(context_parts) if context_parts else "No relevant context found."
-
-            # Generate answer using Ollama
-            system_prompt = """You are a bias detection expert. Answer questions about bias patterns
-using the provided context. Be specific and helpful. If no relevant context is available, say so."""
+            return {
+                "question": question,
+                "answer": answer,
+                "sources": prepared["sources"],
+                "num_sources_used": len(prepared["sources"])
+            }
 
-            user_prompt = f"""Context from analyzed documents:
-{context}
+        except OllamaOverloadedError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error in semantic QA: {str(e)}")
 
-Question: {question}
+    async def semantic_qa_stream(
+        self,
+        question: str,
+        document_id: Optional[str] = None,
+        top_k: int = 5
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of semantic_qa.
 
-Provide a helpful answer based on the context above."""
+        Yields:
+            {"event": "sources", ...} once retrieval is done, then one
+            {"event": "token", "content": ...} per generated piece of the answer
+        """
+        try:
+            prepared = await self._prepare_qa(question, document_id, top_k)
 
-            answer = await ollama_service.generate(user_prompt, system_prompt)
+            if prepared is None:
+                yield {"event": "sources", "sources": [], "num_sources_used": 0}
+                yield {"event": "token", "content": "Could not generate embedding for search."}
+                return
 
-            return {
-                "question": question,
-                "answer": answer,
-                "sources": sources,
-                "num_sources_used": len(sources)
+            yield {
+                "event": "sources",
+                "sources": prepared["sources"],
+                "num_sources_used": len(prepared["sources"])
             }
 
+            async for token in ollama_service.generate_stream(
+                prepared["user_prompt"],
+                prepared["system_prompt"]
+            ):
+                yield {"event": "token", "content": token}
+
+        except OllamaOverloadedError:
+            raise
         except Exception as e:
             raise Exception(f"Error in semantic QA: {str(e)}")
 
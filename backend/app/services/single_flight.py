@@ -0,0 +1,49 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one upstream call
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls.
+
+    The first caller for a key starts the upstream call as its own task;
+    callers arriving while it runs await the same task instead of starting
+    another one. A caller being cancelled does not cancel the shared call.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for this key, or join the call already running for it"""
+        self.calls += 1
+        task = self._in_flight.get(key)
+
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when every caller has gone away
+
+    def get_stats(self) -> Dict:
+        """How many calls were made and how many upstream calls were saved"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,137 @@
+"""
+Extracted-text cache - each upload is parsed once
+Normalized text is stored zstd-compressed next to the uploads, keyed by
+document ID + SHA-256 of the uploaded file
+"""
+import asyncio
+import hashlib
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Optional
+import zstandard
+from app.core.config import settings
+from app.services.document_service import document_service
+from app.services.single_flight import SingleFlight
+
+
+def normalize_text(text: str) -> str:
+    """NFC, Unix newlines, no trailing spaces, at most one blank line in a row"""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in blocks (blocking)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractedTextCache:
+    """
+    Text extracted from uploads, cached on disk.
+
+    Entries live in UPLOAD_DIR/text_cache/<document_id>.<file sha256>.txt.zst,
+    using the hash stored with the document at upload when there is one:
+    a changed upload has a new hash and misses the cache, and its stale
+    entries are removed when the new text is written. Concurrent first
+    reads of the same file share one extraction.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or os.path.join(settings.UPLOAD_DIR, "text_cache"))
+        self.level = settings.TEXT_CACHE_ZSTD_LEVEL
+        self._flights = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, document_id: str, file_hash: str) -> Path:
+        return self.cache_dir / f"{document_id}.{file_hash}.txt.zst"
+
+    def _read(self, path: Path) -> Optional[str]:
+        try:
+            return zstandard.ZstdDecompressor().decompress(path.read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def _write(self, document_id: str, path: Path, text: str):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        tmp_path.write_bytes(
+            zstandard.ZstdCompressor(level=self.level).compress(text.encode("utf-8"))
+        )
+        os.replace(tmp_path, path)
+        for stale in self.cache_dir.glob(f"{document_id}.*.txt.zst"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    async def _extract_and_store(self, document_id: str, path: Path, file_path: str, file_type: str) -> str:
+        self.misses += 1
+        text = normalize_text(await document_service.extract_text(file_path, file_type))
+        try:
+            await asyncio.to_thread(self._write, document_id, path, text)
+        except Exception as e:
+            print(f"Text cache write error: {e}")
+        return text
+
+    async def get_text(
+        self,
+        document_id: str,
+        file_path: str,
+        file_type: str,
+        content_hash: Optional[str] = None
+    ) -> str:
+        """
+        Normalized text of an uploaded document, extracting it on first use
+
+        Args:
+            document_id: Document the file belongs to
+            file_path: Path to the uploaded file
+            file_type: Type of file (pdf, docx, txt)
+            content_hash: SHA-256 of the file recorded at upload; the file is
+                only read and hashed when it is not known
+        """
+        file_hash = content_hash or await asyncio.to_thread(hash_file, file_path)
+        path = self._entry_path(document_id, file_hash)
+
+        try:
+            text = await asyncio.to_thread(self._read, path)
+        except Exception as e:
+            print(f"Text cache read error: {e}")
+            text = None
+        if text is not None:
+            self.hits += 1
+            return text
+
+        return await self._flights.do(
+            str(path),
+            lambda: self._extract_and_store(document_id, path, file_path, file_type)
+        )
+
+    async def delete(self, document_id: str):
+        """Drop every cached text of a document"""
+        def remove():
+            for path in self.cache_dir.glob(f"{document_id}.*.txt.zst"):
+                path.unlink(missing_ok=True)
+
+        await asyncio.to_thread(remove)
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+# Singleton instance
+text_cache = ExtractedTextCache()
@@ -0,0 +1,133 @@
+"""
+Vector backend contract shared by every vector store
+(LanceDB, in-memory NumPy, Pinecone) plus backend-independent helpers
+"""
+from typing import Dict, List, Optional, Protocol, Tuple, Union, runtime_checkable
+
+
+# Search modes: semantic, full-text (BM25) or rank fusion of both
+SEARCH_MODES = ("vector", "keyword", "hybrid")
+
+
+@runtime_checkable
+class VectorBackend(Protocol):
+    """
+    What the API and RAG layers expect from a vector store.
+
+    Results are dicts of the form
+    {"id": ..., "score": 0..1, "metadata": {"text", "document_id", "filename", "chunk_index",
+    "start_offset", "end_offset"}} - the offsets locate the chunk in the document
+    text (None when it was stored without them) - and every method is safe to await from the event loop (blocking work
+    runs off the loop).
+    """
+
+    async def upsert_document(
+        self,
+        document_id: str,
+        text_chunks: List[str],
+        embeddings: List[List[float]],
+        metadata: Dict,
+        chunk_offsets: Optional[List[Tuple[int, int]]] = None
+    ) -> bool:
+        ...
+
+    async def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None,
+        exclude: Optional[Dict] = None,
+        max_distance: Optional[float] = None
+    ) -> List[Dict]:
+        ...
+
+    async def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[List[Dict]]:
+        ...
+
+    async def keyword_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None
+    ) -> List[Dict]:
+        ...
+
+    async def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        exclude: Optional[Dict] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        ef: Optional[int] = None
+    ) -> List[Dict]:
+        ...
+
+    async def get_document_chunks(self, document_id: str, include_vector: bool = False) -> List[Dict]:
+        ...
+
+    async def delete_document(self, document_id: str) -> bool:
+        ...
+
+    async def get_table_version(self) -> Union[int, str]:
+        """Changes on every write (part of the RAG analysis cache key)"""
+        ...
+
+    async def get_stats(self) -> Dict:
+        ...
+
+    def start_maintenance(self):
+        ...
+
+    async def stop_maintenance(self):
+        ...
+
+    def close(self):
+        ...
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], top_k: int, k: int = 60) -> List[Dict]:
+    """
+    Merge several rankings with Reciprocal Rank Fusion
+
+    Each list contributes 1 / (k + rank) per result; the final score is
+    scaled to [0, 1] by the best achievable sum (first everywhere). The
+    original ranks are kept in "ranks".
+    """
+    fused: Dict[str, Dict] = {}
+    for list_index, results in enumerate(result_lists):
+        for rank, result in enumerate(results, start=1):
+            entry = fused.setdefault(result["id"], {
+                "id": result["id"],
+                "metadata": result["metadata"],
+                "score": 0.0,
+                "ranks": [None] * len(result_lists),
+            })
+            entry["score"] += 1.0 / (k + rank)
+            entry["ranks"][list_index] = rank
+
+    best_possible = len(result_lists) / (k + 1)
+    ranked = sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:top_k]
+    for result in ranked:
+        result["score"] = result["score"] / best_possible
+    return ranked
+
+
+def score_to_distance(min_score: float) -> float:
+    """Largest L2 distance matching a minimum score (score = 1 / (1 + distance))"""
+    return 1.0 / min_score - 1.0
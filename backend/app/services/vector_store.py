@@ -0,0 +1,36 @@
+"""
+Vector store used by the API and RAG layers, selected by VECTOR_BACKEND
+"""
+from app.core.config import settings
+from app.services.vector_backend import VectorBackend
+
+VECTOR_BACKENDS = ("lancedb", "numpy", "pinecone")
+
+
+def create_vector_backend(name: str = None) -> VectorBackend:
+    """
+    Build the configured vector backend
+
+    Backends are imported on demand, so only the selected one needs its
+    dependencies (and the Pinecone client is optional).
+
+    Args:
+        name: "lancedb" (default, persistent), "numpy" (in-memory) or "pinecone"
+    """
+    name = (name or settings.VECTOR_BACKEND).lower()
+
+    if name == "lancedb":
+        from app.services.chroma_service import chroma_service
+        return chroma_service
+    if name == "numpy":
+        from app.services.numpy_vector_service import numpy_vector_service
+        return numpy_vector_service
+    if name == "pinecone":
+        from app.services.pinecone_service import pinecone_service
+        return pinecone_service
+
+    raise ValueError(f"Unknown VECTOR_BACKEND '{name}', expected one of {', '.join(VECTOR_BACKENDS)}")
+
+
+# Singleton instance
+vector_service = create_vector_backend()
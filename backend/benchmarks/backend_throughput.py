@@ -0,0 +1,87 @@
+"""
+Benchmark: search throughput of each vector backend through the same harness
+
+Every backend (VECTOR_BACKEND values, built by create_vector_backend) gets
+the same random corpus, then serves the same queries three ways:
+- serial:     one search() at a time
+- concurrent: all search() calls gathered at once
+- batch:      one search_many() call (what POST /search/batch uses)
+
+Usage (from backend/):
+    python -m benchmarks.backend_throughput --rows 20000 --queries 200
+    python -m benchmarks.backend_throughput --backends numpy
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+
+async def _bench_backend(name: str, corpus: np.ndarray, queries: np.ndarray, args) -> dict:
+    from app.services.vector_store import create_vector_backend
+
+    backend = create_vector_backend(name)
+    started = time.perf_counter()
+    for start in range(0, len(corpus), args.batch):
+        rows = corpus[start:start + args.batch]
+        await backend.upsert_document(
+            f"doc-{start // args.batch}", ["chunk"] * len(rows), rows.tolist(), {"filename": "bench.txt"}
+        )
+    ingest_s = time.perf_counter() - started
+    query_lists = queries.tolist()
+
+    started = time.perf_counter()
+    for query in query_lists:
+        await backend.search(query, top_k=args.k)
+    serial_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(backend.search(query, top_k=args.k) for query in query_lists))
+    concurrent_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await backend.search_many(query_lists, top_k=args.k)
+    batch_s = time.perf_counter() - started
+
+    backend.close()
+    return {
+        "ingest_s": ingest_s,
+        "serial_qps": len(queries) / serial_s,
+        "concurrent_qps": len(queries) / concurrent_s,
+        "batch_qps": len(queries) / batch_s,
+    }
+
+
+async def _main(args):
+    settings.CHROMA_PERSIST_DIR = tempfile.mkdtemp(prefix="bench_backends_")
+    rng = np.random.default_rng(0)
+    corpus = rng.random((args.rows, args.dim), dtype=np.float32)
+    queries = rng.random((args.queries, args.dim), dtype=np.float32)
+
+    print(f"{args.rows} vectors x {args.dim}, {args.queries} queries, top_k={args.k}")
+    print(f"{'backend':<10}{'ingest s':>10}{'serial q/s':>12}{'concurrent q/s':>16}{'batch q/s':>11}")
+    for name in args.backends.split(","):
+        r = await _bench_backend(name.strip(), corpus, queries, args)
+        print(
+            f"{name:<10}{r['ingest_s']:>10.1f}{r['serial_qps']:>12.0f}"
+            f"{r['concurrent_qps']:>16.0f}{r['batch_qps']:>11.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="lancedb,numpy", help="comma-separated VECTOR_BACKEND values")
+    parser.add_argument("--rows", type=int, default=20000, help="corpus size")
+    parser.add_argument("--dim", type=int, default=768, help="embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="number of queries")
+    parser.add_argument("--k", type=int, default=10, help="top_k")
+    parser.add_argument("--batch", type=int, default=500, help="chunks per upserted document")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
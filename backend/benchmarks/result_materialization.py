@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: turning a vector search result into response dicts
+
+Compares, on the same Arrow result table:
+- pandas: to_pandas() then iterrows() (previous VectorService path)
+- arrow:  arrow_to_results(), built from whole-column to_pylist()
+
+Usage (from backend/):
+    python -m benchmarks.result_materialization --rows 10000
+"""
+import argparse
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from app.services.chroma_service import arrow_to_results
+
+
+def _make_result_table(rows: int, dim: int) -> pa.Table:
+    rng = np.random.default_rng(0)
+    vectors = rng.random((rows, dim), dtype=np.float32)
+    return pa.table({
+        "id": [f"doc-{i // 50}_chunk_{i % 50}" for i in range(rows)],
+        "text": [f"chunk text number {i} " * 20 for i in range(rows)],
+        "document_id": [f"doc-{i // 50}" for i in range(rows)],
+        "filename": [f"doc-{i // 50}.pdf" for i in range(rows)],
+        "chunk_index": pa.array([i % 50 for i in range(rows)], pa.int32()),
+        "start_offset": pa.array([(i % 50) * 400 for i in range(rows)], pa.int32()),
+        "end_offset": pa.array([(i % 50) * 400 + 420 for i in range(rows)], pa.int32()),
+        "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), dim),
+        "_distance": pa.array(rng.random(rows, dtype=np.float32)),
+    })
+
+
+def pandas_iterrows(table: pa.Table):
+    """The previous implementation, kept here for comparison"""
+    df = table.to_pandas()
+    results = []
+    for _, row in df.iterrows():
+        distance = row.get("_distance", 0)
+        results.append({
+            "id": row["id"],
+            "score": 1 / (1 + distance),
+            "metadata": {
+                "text": row["text"],
+                "document_id": row["document_id"],
+                "filename": row["filename"],
+                "chunk_index": row["chunk_index"],
+                "start_offset": row["start_offset"],
+                "end_offset": row["end_offset"],
+            }
+        })
+    return results
+
+
+def _best_of(fn, table, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(table)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows in the result")
+    parser.add_argument("--dim", type=int, default=768, help="embedding dimension")
+    parser.add_argument("--repeat", type=int, default=5, help="best-of repetitions")
+    args = parser.parse_args()
+
+    table = _make_result_table(args.rows, args.dim)
+    assert len(pandas_iterrows(table)) == len(arrow_to_results(table)) == args.rows
+
+    pandas_ms = _best_of(pandas_iterrows, table, args.repeat)
+    arrow_ms = _best_of(arrow_to_results, table, args.repeat)
+
+    print(f"{args.rows} rows, dim {args.dim} (best of {args.repeat})")
+    print(f"  pandas + iterrows  {pandas_ms:8.1f} ms")
+    print(f"  arrow columns      {arrow_ms:8.1f} ms  ({pandas_ms / arrow_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark: /search latency while a bulk upsert is running
+
+Requests go through the real FastAPI app (POST /api/v1/search/ over an
+in-process ASGI client): request validation, the query embedding path,
+VectorService.search and response serialization. Only Ollama is stubbed,
+with an instant fake /api/embed, so the numbers are about the server and
+LanceDB rather than the embedding model.
+
+Searches arrive on a fixed schedule (open loop) while another coroutine
+keeps upserting documents into the same VectorService, as the background
+embedding task does. Latency is measured from the scheduled arrival time,
+so time spent waiting for a blocked event loop counts. A probe coroutine
+also records event-loop lag (how late a 10 ms sleep wakes up), which is
+what every other request on the server feels. Three modes:
+- idle:   all documents upserted first, then the same search schedule for
+          --idle seconds with no ingest (baseline at the final table size)
+- inline: LanceDB calls run directly on the event loop (previous behaviour)
+- pool:   LanceDB calls run in VectorService's dedicated thread pool
+
+Usage (from backend/):
+    python -m benchmarks.search_under_ingest --docs 40 --chunks 200
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from app.core.config import settings
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class _StubOllamaClient:
+    """Instant /api/embed: a deterministic unit vector per input text"""
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, payload):
+            self.payload = payload
+
+        def json(self):
+            return self.payload
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _vector(self, text: str):
+        rng = random.Random(hashlib.sha256(text.encode()).digest())
+        vector = [rng.random() for _ in range(self.dim)]
+        norm = sum(v * v for v in vector) ** 0.5
+        return [v / norm for v in vector]
+
+    async def post(self, path, json=None, timeout=None):
+        return self.Response({"embeddings": [self._vector(text) for text in json["input"]]})
+
+
+async def _run_mode(mode: str, args) -> dict:
+    from main import app
+    from app.api.endpoints import search
+    from app.services.chroma_service import VectorService
+    from app.services.ollama_service import ollama_service
+
+    settings.CHROMA_PERSIST_DIR = tempfile.mkdtemp(prefix=f"bench_{mode}_")
+    settings.EMBEDDING_CACHE_ENABLED = False  # every request embeds its query
+    service = VectorService()
+    search.vector_service = service
+
+    stub = _StubOllamaClient(args.dim)
+
+    async def stub_client():
+        return stub
+    ollama_service._get_client = stub_client
+
+    if mode == "inline":
+        async def run_inline(fn, *a, **kw):
+            return fn(*a, **kw)
+        service._run = run_inline
+
+    rng = random.Random(0)
+
+    def vector():
+        return [rng.random() for _ in range(args.dim)]
+
+    # Seed the table so searches have something to scan
+    await service.upsert_document(
+        "seed", [f"seed {i}" for i in range(args.chunks)],
+        [vector() for _ in range(args.chunks)], {"filename": "seed.txt"}
+    )
+
+    ingest_done = asyncio.Event()
+    latencies = []
+    failures = 0
+
+    # Embeddings are produced before the timed section (Ollama does this in production)
+    documents = [[vector() for _ in range(args.chunks)] for _ in range(args.docs)]
+
+    async def upsert_all():
+        for d, embeddings in enumerate(documents):
+            await service.upsert_document(
+                f"doc-{d}", [f"chunk {i}" for i in range(args.chunks)],
+                embeddings, {"filename": f"doc-{d}.txt"}
+            )
+            await asyncio.sleep(0)  # a real ingest yields while awaiting embeddings
+
+    if mode == "idle":
+        await upsert_all()
+
+    async def ingest():
+        if mode == "idle":
+            await asyncio.sleep(args.idle)
+        else:
+            await upsert_all()
+        ingest_done.set()
+
+    async def searcher(client: httpx.AsyncClient, s: int):
+        nonlocal failures
+        arrival = time.perf_counter()
+        n = 0
+        while not ingest_done.is_set():
+            arrival += args.interval
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            # Distinct queries, so request coalescing does not merge searchers
+            response = await client.post(
+                f"{settings.API_V1_STR}/search/", json={"query": f"query {s}-{n}", "top_k": 5}
+            )
+            n += 1
+            if response.status_code != 200:
+                failures += 1
+                continue
+            latencies.append((time.perf_counter() - arrival) * 1000)
+
+    lags = []
+
+    async def lag_probe():
+        while not ingest_done.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            ingest(), lag_probe(), *(searcher(client, s) for s in range(args.searchers))
+        )
+        elapsed = time.perf_counter() - started
+    service.close()
+
+    return {
+        "mode": mode,
+        "searches": len(latencies),
+        "failures": failures,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "lag_p99_ms": _percentile(lags, 99),
+        "ingest_s": elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=40, help="documents upserted during the run")
+    parser.add_argument("--chunks", type=int, default=200, help="chunks per document")
+    parser.add_argument("--dim", type=int, default=768, help="embedding dimension")
+    parser.add_argument("--searchers", type=int, default=4, help="concurrent search loops")
+    parser.add_argument("--interval", type=float, default=0.05, help="time between search arrivals per searcher (s)")
+    parser.add_argument("--idle", type=float, default=5.0, help="length of the no-ingest baseline run (s)")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, VECTOR_DB_THREADS={settings.VECTOR_DB_THREADS}")
+    print(
+        f"{'mode':<8}{'searches':>10}{'failed':>8}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'max ms':>10}{'lag p99':>10}{'ingest s':>10}"
+    )
+    for mode in ("idle", "inline", "pool"):
+        r = await _run_mode(mode, args)
+        print(
+            f"{r['mode']:<8}{r['searches']:>10}{r['failures']:>8}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+            f"{r['max_ms']:>10.1f}{r['lag_p99_ms']:>10.1f}{r['ingest_s']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""
+Benchmark: recall@10 vs. memory and latency for vector storage formats
+
+Each configuration (VECTOR_STORAGE_PRECISION x VECTOR_STORAGE_DIM) gets its
+own VectorService table filled with the same embeddings. Queries go through
+VectorService.search, and recall@10 is measured against an exact float32
+full-dimension search done in NumPy. Storage formats are searched
+exhaustively; the "+ IVF_HNSW_SQ" row builds that index (int8 scalar
+quantization) over float32 storage for comparison. It trades disk for
+speed: the int8 codes are stored in addition to the float32 vectors.
+
+By default the corpus is synthetic: clustered unit vectors whose variance
+decays across dimensions, a rough stand-in for a Matryoshka-trained model.
+Truncation recall on synthetic data is only indicative, so pass real
+nomic-embed-text vectors with --embeddings (a .npy array, rows x 768) for
+numbers that matter.
+
+Usage (from backend/):
+    python -m benchmarks.vector_precision --rows 10000 --queries 200
+    python -m benchmarks.vector_precision --embeddings corpus.npy
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+# (VECTOR_STORAGE_PRECISION, VECTOR_STORAGE_DIM, index type or None for exhaustive)
+CONFIGS = [
+    ("float32", None, None),
+    ("float16", None, None),
+    ("float32", 512, None),
+    ("float16", 256, None),
+    ("float16", 128, None),
+    ("float32", None, "IVF_HNSW_SQ"),
+]
+
+
+def _synthetic_embeddings(rows: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    decay = 1.0 / np.sqrt(np.arange(1, dim + 1))
+    centers = rng.normal(size=(max(1, rows // 100), dim)) * decay
+    vectors = centers[rng.integers(0, len(centers), rows)] + 0.5 * rng.normal(size=(rows, dim)) * decay
+    return vectors.astype(np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    # Unit vectors: smallest L2 distance == largest dot product
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+async def _run_config(precision, dim, index_type, corpus, queries, truth, k, batch) -> dict:
+    from app.services.chroma_service import VectorService
+
+    settings.CHROMA_PERSIST_DIR = tempfile.mkdtemp(prefix=f"bench_{precision}_{dim}_")
+    settings.VECTOR_STORAGE_PRECISION = precision
+    settings.VECTOR_STORAGE_DIM = dim
+    if index_type:
+        settings.VECTOR_INDEX_TYPE = index_type
+    service = VectorService()
+
+    started = time.perf_counter()
+    for start in range(0, len(corpus), batch):
+        rows = corpus[start:start + batch]
+        await service.upsert_document(
+            f"doc-{start // batch}",
+            ["chunk"] * len(rows),
+            rows.tolist(),
+            {"filename": "bench.txt"}
+        )
+    if index_type:
+        await service.maybe_build_index(force=True)
+    ingest_s = time.perf_counter() - started
+
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = await service.search(query.tolist(), top_k=k)
+        latencies.append(time.perf_counter() - started)
+        found = {
+            int(r["metadata"]["document_id"].split("-")[1]) * batch + r["metadata"]["chunk_index"]
+            for r in results
+        }
+        hits += len(found & set(expected.tolist()))
+
+    stats = await service.get_stats()
+    service.close()
+    latencies.sort()
+    return {
+        "format": f"{precision} x {stats['vector_format']['dim']}" + (f" + {index_type}" if index_type else ""),
+        "recall": hits / (len(queries) * k),
+        "raw_mb": stats["vector_format"]["raw_vector_bytes"] / 2**20,
+        "disk_mb": _dir_size(settings.CHROMA_PERSIST_DIR) / 2**20,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p99_ms": 1000 * latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        "ingest_s": ingest_s,
+    }
+
+
+async def _main(args):
+    if args.embeddings:
+        data = _normalize(np.load(args.embeddings).astype(np.float32))
+        rng = np.random.default_rng(0)
+        order = rng.permutation(len(data))
+        queries, corpus = data[order[:args.queries]], data[order[args.queries:]]
+        source = args.embeddings
+    else:
+        data = _normalize(_synthetic_embeddings(args.rows + args.queries, args.dim))
+        queries, corpus = data[:args.queries], data[args.queries:]
+        source = "synthetic"
+
+    truth = _exact_top_k(corpus, queries, args.k)
+    print(f"{len(corpus)} vectors x {corpus.shape[1]} ({source}), {len(queries)} queries, recall@{args.k}")
+    print(f"{'format':<30}{'recall':>8}{'raw MB':>9}{'disk MB':>9}{'p50 ms':>9}{'p99 ms':>9}{'ingest s':>10}")
+    for precision, dim, index_type in CONFIGS:
+        if dim and dim >= corpus.shape[1]:
+            continue
+        r = await _run_config(precision, dim, index_type, corpus, queries, truth, args.k, args.batch)
+        print(
+            f"{r['format']:<30}{r['recall']:>8.3f}{r['raw_mb']:>9.1f}{r['disk_mb']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['ingest_s']:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768, help="synthetic embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="queries (held out from the corpus)")
+    parser.add_argument("--k", type=int, default=10, help="recall@k")
+    parser.add_argument("--batch", type=int, default=500, help="chunks per upserted document")
+    parser.add_argument("--embeddings", help=".npy file of real embeddings (rows x dim)")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
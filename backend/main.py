@@ -3,12 +3,17 @@ BiasDetector API - 100% Local AI with Ollama + ChromaDB
 No API keys needed! RAG-powered bias detection system.
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.endpoints import analysis, documents, search, rag
 from app.services.database_service import database_service
 from app.services.ollama_service import ollama_service
+from app.services.embedding_cache import embedding_cache
+from app.services.extraction_pool import extraction_pool
+from app.services.vector_store import vector_service
+from app.services.inference_scheduler import OllamaOverloadedError
 
 
 @asynccontextmanager
@@ -20,12 +25,16 @@ async def lifespan(app: FastAPI):
     print("="*50)
     print(f"  AI Model: {settings.OLLAMA_MODEL}")
     print(f"  Embeddings: {settings.OLLAMA_EMBEDDING_MODEL}")
-    print(f"  Vector DB: ChromaDB (local)")
+    print(f"  Vector DB: {settings.VECTOR_BACKEND}")
     print(f"  RAG Enabled: {settings.RAG_ENABLED}")
     print("="*50 + "\n")
 
-    # Check Ollama status
-    ollama_status = await ollama_service.get_status()
+    # Open the pooled HTTP client shared by every Ollama call
+    await ollama_service.connect()
+
+    # Check Ollama status, then keep the snapshot fresh in the background
+    ollama_status = await ollama_service.refresh_status()
+    ollama_service.start_status_poller()
     if ollama_status["status"] == "online":
         print(f"Ollama: Connected")
         print(f"Available models: {', '.join(ollama_status.get('models_available', []))}")
@@ -38,11 +47,20 @@ async def lifespan(app: FastAPI):
     # Connect to MongoDB
     await database_service.connect()
 
+    # Vector table maintenance (ANN index) in the background
+    vector_service.start_maintenance()
+
     yield
 
     # Shutdown
     print("\nShutting down BiasDetector API...")
+    await ollama_service.stop_status_poller()
+    await vector_service.stop_maintenance()
     await database_service.disconnect()
+    await ollama_service.disconnect()
+    embedding_cache.close()
+    extraction_pool.close()
+    vector_service.close()
 
 
 app = FastAPI(
@@ -90,6 +108,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(OllamaOverloadedError)
+async def ollama_overloaded_handler(request: Request, exc: OllamaOverloadedError):
+    """Inference queue full or wait too long - tell the client when to retry"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 # Include routers
 app.include_router(analysis.router, prefix=f"{settings.API_V1_STR}/analysis", tags=["Analysis"])
 app.include_router(documents.router, prefix=f"{settings.API_V1_STR}/documents", tags=["Documents"])
@@ -98,9 +126,9 @@ app.include_router(rag.router, prefix=f"{settings.API_V1_STR}/rag", tags=["RAG"]
 
 
 @app.get("/")
-async def root():
+async def root(fresh: bool = Query(default=False, description="Check Ollama live instead of using the cached status")):
     """Root endpoint - API info and status"""
-    ollama_status = await ollama_service.get_status()
+    ollama_status = await ollama_service.get_status(fresh=fresh)
 
     return {
         "message": "BiasDetector API - 100% Local AI",
@@ -121,9 +149,9 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(fresh: bool = Query(default=False, description="Check Ollama live instead of using the cached status")):
     """Health check endpoint"""
-    ollama_status = await ollama_service.get_status()
+    ollama_status = await ollama_service.get_status(fresh=fresh)
 
     return {
         "status": "healthy" if ollama_status["status"] == "online" else "degraded",
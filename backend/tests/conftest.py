@@ -0,0 +1,18 @@
+"""
+Shared fixtures
+"""
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.services import database_service as database_module
+from app.services.database_service import database_service
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """The database service connected to an in-memory MongoDB"""
+    monkeypatch.setattr(database_module, "AsyncIOMotorClient", lambda url: AsyncMongoMockClient())
+    asyncio.run(database_service.connect())
+    assert database_service.connected
+    yield database_service
+    asyncio.run(database_service.disconnect())
@@ -0,0 +1,96 @@
+"""
+Tests for the analysis cache of /analysis/analyze
+"""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.endpoints import analysis
+from app.core.config import settings
+from app.services.numpy_vector_service import NumpyVectorService
+from app.services.ollama_service import ollama_service
+from app.services.text_cache import text_cache
+
+
+@pytest.fixture
+def analyze(monkeypatch, tmp_path, database):
+    """POST /analyze on one uploaded document, with fake Ollama calls"""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(text_cache, "cache_dir", tmp_path / "text_cache")
+    (tmp_path / "doc1.txt").write_text("Everyone agrees the plan works. " * 40)
+
+    store = NumpyVectorService()
+    monkeypatch.setattr(analysis, "vector_service", store)
+
+    calls = {"analyze": 0}
+
+    async def fake_analyze_document(text, bias_types=None):
+        calls["analyze"] += 1
+        return {"overall_score": 0.4, "bias_instances": [], "summary": "fine"}
+
+    async def fake_generate_embeddings(texts):
+        return [[1.0, float(len(text))] for text in texts]
+
+    monkeypatch.setattr(ollama_service, "analyze_document", fake_analyze_document)
+    monkeypatch.setattr(ollama_service, "generate_embeddings", fake_generate_embeddings)
+
+    client = TestClient(app)
+
+    def post(force=False):
+        response = client.post(
+            f"{settings.API_V1_STR}/analysis/analyze",
+            json={"document_id": "doc1", "use_rag": False, "force": force}
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return post, calls, store
+
+
+def test_miss_then_hit(analyze):
+    post, calls, store = analyze
+
+    first = post()
+    assert first["cache_metadata"]["cache_hit"] is False
+    assert calls["analyze"] == 1
+    assert asyncio.run(store.get_document_chunks("doc1"))
+
+    second = post()
+    assert second["cache_metadata"]["cache_hit"] is True
+    assert second["cache_metadata"]["cache_key"] == first["cache_metadata"]["cache_key"]
+    assert second["overall_score"] == first["overall_score"]
+    assert calls["analyze"] == 1
+
+
+def test_hit_reindexes_missing_vectors(analyze):
+    post, calls, store = analyze
+
+    post()
+    chunks = asyncio.run(store.get_document_chunks("doc1"))
+    asyncio.run(store.delete_document("doc1"))
+
+    assert post()["cache_metadata"]["cache_hit"] is True
+    assert calls["analyze"] == 1
+    assert asyncio.run(store.get_document_chunks("doc1")) == chunks
+
+
+def test_force_bypasses_the_cache(analyze):
+    post, calls, _ = analyze
+
+    post()
+    forced = post(force=True)
+    assert forced["cache_metadata"]["cache_hit"] is False
+    assert calls["analyze"] == 2
+
+
+def test_chunking_settings_change_the_key(analyze, monkeypatch):
+    post, calls, _ = analyze
+
+    key = post()["cache_metadata"]["cache_key"]
+    monkeypatch.setattr(settings, "ANALYSIS_CHUNK_SIZE", settings.ANALYSIS_CHUNK_SIZE + 1)
+    monkeypatch.setattr(settings, "ANALYSIS_CHUNKED_ENABLED", True)
+
+    result = post()
+    assert result["cache_metadata"]["cache_hit"] is False
+    assert result["cache_metadata"]["cache_key"] != key
+    assert calls["analyze"] == 2
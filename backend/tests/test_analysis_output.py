@@ -0,0 +1,26 @@
+"""
+Tests for structured analysis output parsing and its counters
+"""
+import pytest
+from app.core.config import settings
+from app.services.ollama_service import OllamaService
+
+
+@pytest.mark.asyncio
+async def test_output_fixed_by_a_retry_is_not_a_first_try_success(monkeypatch):
+    monkeypatch.setattr(settings, "ANALYSIS_JSON_MAX_RETRIES", 1)
+    service = OllamaService()
+    replies = iter(["not json at all", '{"overall_score": 0.2, "summary": "ok", "bias_instances": []}'])
+
+    async def fake_generate(prompt, system_prompt=None, **kwargs):
+        return next(replies)
+
+    monkeypatch.setattr(service, "generate", fake_generate)
+    result = await service.analyze_bias("Some text.")
+
+    assert result["summary"] == "ok"
+    stats = service.get_analysis_output_stats()
+    assert stats["valid_first_try"] == 0
+    assert stats["valid_on_retry"] == 1
+    assert stats["retries"] == 1
+    assert stats["responses"] == 2
@@ -0,0 +1,41 @@
+"""
+Tests for map-reduce analysis of long documents
+"""
+import pytest
+from app.services.ollama_service import OllamaService
+from app.core.config import settings
+
+
+@pytest.mark.asyncio
+async def test_chunked_analysis_maps_positions_to_document(monkeypatch):
+    """Instances found in later chunks are reported in document coordinates"""
+    monkeypatch.setattr(settings, "ANALYSIS_CHUNK_SIZE", 1000)
+    monkeypatch.setattr(settings, "ANALYSIS_CHUNK_OVERLAP", 100)
+    text = ("Neutral sentence here. " * 200) + "Women are bad drivers. " + ("Neutral again. " * 50)
+
+    service = OllamaService()
+
+    async def fake_analyze_bias(chunk, bias_types=None, context=None):
+        if "Women are bad drivers." in chunk:
+            return {
+                "overall_score": 0.8,
+                "summary": "Gender stereotype",
+                "bias_instances": [{
+                    "type": "gender",
+                    "text": "Women are bad drivers.",
+                    "explanation": "Stereotype",
+                    "severity": 0.8,
+                    "start_position": 0,
+                    "end_position": 0
+                }]
+            }
+        return {"overall_score": 0.0, "summary": "", "bias_instances": []}
+
+    monkeypatch.setattr(service, "analyze_bias", fake_analyze_bias)
+    result = await service.analyze_bias_chunked(text)
+
+    assert result["chunk_metadata"]["num_chunks"] > 1
+    assert len(result["bias_instances"]) == 1
+    instance = result["bias_instances"][0]
+    assert text[instance["start_position"]:instance["end_position"]] == "Women are bad drivers."
+    assert 0 < result["overall_score"] < 0.8
@@ -0,0 +1,39 @@
+"""
+Tests for the sentence-aware, offset-preserving chunker
+"""
+from app.services.document_service import DocumentService
+
+
+TEXT = (
+    "  The first sentence is short. The second one asks a question?\n"
+    "A line without punctuation\n\n"
+    + "Short words here. " * 15
+    + "word " * 30
+    + "The end."
+)
+
+
+def test_chunks_carry_exact_offsets_and_respect_the_budget():
+    chunks = list(DocumentService.iter_chunks(TEXT, budget=20, overlap=8))
+
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert TEXT[chunk.start:chunk.end] == chunk.text
+        assert chunk.text == chunk.text.strip()
+        assert 0 < chunk.tokens <= 20
+    assert chunks[0].text == (
+        "The first sentence is short. The second one asks a question?\nA line without punctuation"
+    )
+    assert chunks[-1].text.endswith("The end.")
+    # Chunks move forward and leave nothing but whitespace uncovered
+    assert all(a.start < b.start and not TEXT[a.end:b.start].strip() for a, b in zip(chunks, chunks[1:]))
+    assert any(b.start < a.end for a, b in zip(chunks, chunks[1:]))
+
+
+def test_character_budget_keeps_whole_sentences():
+    text = "Alpha beta gamma. " * 50
+    chunks = list(DocumentService.iter_chunks(text, budget=100, overlap=20, unit="chars"))
+
+    assert all(len(chunk.text) <= 100 for chunk in chunks)
+    assert all(chunk.text.startswith("Alpha") and chunk.text.endswith("gamma.") for chunk in chunks)
+    assert list(DocumentService.iter_chunks("   ", budget=100)) == []
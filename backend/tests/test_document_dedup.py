@@ -0,0 +1,80 @@
+"""
+Tests for content-hash deduplication of uploads and alias promotion
+"""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.endpoints import documents
+from app.core.config import settings
+from app.services.numpy_vector_service import NumpyVectorService
+from app.services.text_cache import text_cache
+
+
+def test_identical_uploads_race_for_the_content_hash(database):
+    async def race():
+        return await asyncio.gather(*(
+            database.save_document({"document_id": f"doc{i}", "filename": "a.txt", "content_hash": "h"})
+            for i in range(3)
+        ))
+
+    holders = asyncio.run(race())
+    winner = holders[0]
+    assert holders == [winner] * 3
+
+    async def records():
+        return [doc async for doc in database.documents_collection.find({"content_hash": "h"})]
+
+    by_id = {doc["document_id"]: doc for doc in asyncio.run(records())}
+    assert len(by_id) == 3
+    assert [d for d, doc in by_id.items() if doc.get("original")] == [winner]
+    assert all(doc["alias_of"] == winner for d, doc in by_id.items() if d != winner)
+    assert asyncio.run(database.resolve_document_id("doc2")) == winner
+
+
+def test_deleting_the_original_hands_everything_to_the_alias(database, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(text_cache, "cache_dir", tmp_path / "text_cache")
+    store = NumpyVectorService()
+    monkeypatch.setattr(documents, "vector_service", store)
+    client = TestClient(app)
+
+    def upload():
+        response = client.post(
+            f"{settings.API_V1_STR}/documents/upload",
+            files={"file": ("notes.txt", b"The same words.", "text/plain")}
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    original_id = upload()["document_id"]
+    second = upload()
+    alias_id = second["document_id"]
+    assert second["duplicate_of"] == original_id
+
+    asyncio.run(store.upsert_document(
+        original_id, ["The same", "words."], [[1.0, 0.0], [0.0, 1.0]],
+        {"filename": f"{original_id}.txt"}, chunk_offsets=[(0, 8), (9, 15)]
+    ))
+    asyncio.run(database.save_analysis({"document_id": original_id, "overall_score": 0.2}))
+    before = asyncio.run(store.get_document_chunks(original_id, include_vector=True))
+
+    assert client.delete(f"{settings.API_V1_STR}/documents/{original_id}").status_code == 204
+
+    assert asyncio.run(database.resolve_document_id(alias_id)) == alias_id
+    assert asyncio.run(database.get_document(original_id)) is None
+    assert (tmp_path / f"{alias_id}.txt").read_bytes() == b"The same words."
+    assert not (tmp_path / f"{original_id}.txt").exists()
+    assert [a["overall_score"] for a in asyncio.run(database.get_analyses_for_document(alias_id))] == [0.2]
+
+    after = asyncio.run(store.get_document_chunks(alias_id, include_vector=True))
+    assert asyncio.run(store.get_document_chunks(original_id)) == []
+    assert [(c["metadata"]["text"], c["metadata"]["start_offset"], c["vector"]) for c in after] == [
+        (c["metadata"]["text"], c["metadata"]["start_offset"], c["vector"]) for c in before
+    ]
+    assert {c["metadata"]["filename"] for c in after} == {f"{alias_id}.txt"}
+
+    # The promoted alias is now an ordinary original: deleting it removes the rest
+    assert client.delete(f"{settings.API_V1_STR}/documents/{alias_id}").status_code == 204
+    assert asyncio.run(store.get_document_chunks(alias_id)) == []
+    assert not list(tmp_path.glob(f"{alias_id}.*"))
@@ -0,0 +1,64 @@
+"""
+Tests for the content-addressed embedding cache
+"""
+import pytest
+from app.services.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(
+        db_path=str(tmp_path / "cache.sqlite"),
+        max_memory_entries=2,
+        max_disk_entries=3
+    )
+    yield cache
+    cache.close()
+
+
+def test_key_ignores_whitespace_and_depends_on_model():
+    """Normalized text shares a key, different models do not"""
+    assert EmbeddingCache.make_key("m", "a  b\n") == EmbeddingCache.make_key("m", " a b")
+    assert EmbeddingCache.make_key("m", "a b") != EmbeddingCache.make_key("other", "a b")
+
+
+@pytest.mark.asyncio
+async def test_memory_and_disk_hits(cache):
+    """Evicted memory entries are still served from disk"""
+    await cache.put_many("m", ["one", "two", "three"], [[1.0], [2.0], [3.0]])
+
+    assert await cache.get_many("m", ["three", "one", "missing"]) == [[3.0], [1.0], None]
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_eviction(cache):
+    """Disk tier stays within its size limit"""
+    await cache.put_many("m", ["a", "b", "c", "d", "e"], [[1.0]] * 5)
+
+    assert cache.get_stats()["disk_entries"] == 3
+    assert cache.get_stats()["evictions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_from_older_format_is_dropped(tmp_path):
+    """Vectors cached under a previous format version are not served"""
+    import sqlite3
+
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(db_path=db_path)
+    await cache.put_many("m", ["kept"], [[1.0]])
+    cache.close()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    reopened = EmbeddingCache(db_path=db_path)
+    assert await reopened.get_many("m", ["kept"]) == [None]
+    assert reopened.get_stats()["disk_entries"] == 0
+    reopened.close()
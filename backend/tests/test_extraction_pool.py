@@ -0,0 +1,36 @@
+"""
+Tests for the document extraction process pool
+"""
+import time
+import pytest
+from app.services.extraction_pool import ExtractionPool
+
+
+@pytest.mark.asyncio
+async def test_runs_in_worker_and_kills_stuck_documents():
+    pool = ExtractionPool(max_workers=1, timeout=3, memory_limit_mb=0)
+    try:
+        assert await pool.run(sum, [1, 2, 3]) == 6
+
+        started = time.monotonic()
+        with pytest.raises(Exception, match="timed out"):
+            await pool.run(time.sleep, 30)
+        assert time.monotonic() - started < 10
+        assert pool.get_stats()["restarts"] == 1
+
+        # The replacement pool keeps serving
+        assert await pool.run(sum, [4, 5]) == 9
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_memory_cap_fails_the_document_only():
+    pool = ExtractionPool(max_workers=1, timeout=30, memory_limit_mb=512)
+    try:
+        with pytest.raises(MemoryError):
+            await pool.run(bytearray, 2 * 1024 ** 3)
+        assert await pool.run(sum, [1, 1]) == 2
+        assert pool.get_stats()["failed"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,68 @@
+"""
+Tests for the priority-aware Ollama inference scheduler
+"""
+import asyncio
+import pytest
+from app.services.inference_scheduler import (
+    InferenceScheduler,
+    OllamaOverloadedError,
+    Priority,
+    inference_priority
+)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = InferenceScheduler()
+    scheduler.lanes["embed"].limit = 1
+    scheduler.max_queue[Priority.INTERACTIVE] = 2
+    return scheduler
+
+
+@pytest.mark.asyncio
+async def test_interactive_served_before_bulk(scheduler):
+    """Queued interactive calls get the next free slot ahead of earlier bulk calls"""
+    order = []
+    release = asyncio.Event()
+
+    async def call(name, priority):
+        async with scheduler.slot("embed", priority):
+            order.append(name)
+            if name == "first":
+                await release.wait()
+
+    first = asyncio.create_task(call("first", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    bulk = asyncio.create_task(call("bulk", Priority.BULK))
+    await asyncio.sleep(0)
+    with inference_priority(Priority.INTERACTIVE):
+        interactive = asyncio.create_task(call("interactive", None))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(first, bulk, interactive)
+    assert order == ["first", "interactive", "bulk"]
+    assert scheduler.get_stats()["embed"]["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after(scheduler):
+    """A caller beyond the queue limit gets 429 with a Retry-After hint"""
+    release = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot("embed", Priority.INTERACTIVE):
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold()) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(OllamaOverloadedError) as exc_info:
+        async with scheduler.slot("embed", Priority.INTERACTIVE):
+            pass
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.lanes["embed"].in_flight == 0
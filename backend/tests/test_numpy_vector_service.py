@@ -0,0 +1,66 @@
+"""
+Tests for the in-memory NumPy vector backend
+"""
+import numpy as np
+import pytest
+from app.services.numpy_vector_service import NumpyVectorService
+from app.services.vector_backend import VectorBackend
+
+
+@pytest.fixture
+def store():
+    return NumpyVectorService()
+
+
+async def _fill(store, rng):
+    vectors = {}
+    for d in range(3):
+        vectors[d] = rng.random((10, 8)).astype(np.float32)
+        texts = [f"doc {d} chunk {i}" for i in range(10)]
+        if d == 2:
+            texts[4] = "the senator quoted 47 percent"
+        await store.upsert_document(f"doc{d}", texts, vectors[d].tolist(), {"filename": f"doc{d}.txt"})
+    return np.vstack([vectors[d] for d in range(3)])
+
+
+def test_satisfies_backend_protocol(store):
+    assert isinstance(store, VectorBackend)
+
+
+@pytest.mark.asyncio
+async def test_search_matches_exact_l2_with_filters(store):
+    matrix = await _fill(store, np.random.default_rng(0))
+    query = matrix[13]
+
+    results = await store.search(query.tolist(), top_k=5)
+    expected = np.argsort(((matrix - query) ** 2).sum(axis=1))[:5]
+    assert [r["id"] for r in results] == [f"doc{i // 10}_chunk_{i % 10}" for i in expected]
+    assert results[0]["score"] == pytest.approx(1.0)
+
+    excluded = await store.search(query.tolist(), top_k=5, exclude={"document_id": "doc1"})
+    assert all(r["metadata"]["document_id"] != "doc1" for r in excluded)
+
+    only = await store.search(query.tolist(), top_k=5, filter={"document_id": ["doc2"]})
+    assert {r["metadata"]["document_id"] for r in only} == {"doc2"}
+
+    batched = await store.search_many([matrix[3].tolist(), query.tolist()], top_k=5)
+    assert [r["id"] for r in batched[1]] == [r["id"] for r in results]
+    assert batched[0][0]["id"] == "doc0_chunk_3"
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_upsert_and_delete(store):
+    await _fill(store, np.random.default_rng(1))
+    version = await store.get_table_version()
+
+    hits = await store.keyword_search("Senator", top_k=3)
+    assert hits[0]["metadata"]["text"] == "the senator quoted 47 percent"
+    assert hits[0]["score"] == 1.0
+
+    await store.upsert_document("doc2", ["replacement"], [[0.0] * 8], {"filename": "doc2.txt"})
+    assert await store.keyword_search("senator") == []
+    assert len(await store.get_document_chunks("doc2")) == 1
+
+    await store.delete_document("doc0")
+    assert (await store.get_stats())["total_vectors"] == 11
+    assert await store.get_table_version() != version
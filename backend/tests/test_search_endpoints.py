@@ -0,0 +1,117 @@
+"""
+Tests for the search endpoints
+"""
+import asyncio
+import hashlib
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.endpoints import search
+from app.core.config import settings
+from app.services.numpy_vector_service import NumpyVectorService
+from app.services.ollama_service import ollama_service
+
+
+def _fake_vector(text: str) -> list:
+    rng = np.random.default_rng(int(hashlib.sha256(text.encode()).hexdigest()[:8], 16))
+    vector = rng.random(16)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeOllamaClient:
+    """Ollama's two embedding endpoints: /api/embed normalizes, /api/embeddings does not"""
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, payload):
+            self.payload = payload
+
+        def json(self):
+            return self.payload
+
+    async def post(self, path, json=None, timeout=None):
+        if path == "/api/embed":
+            return self.Response({"embeddings": [_fake_vector(text) for text in json["input"]]})
+        raw = [3.0 * value for value in _fake_vector(json["prompt"])]
+        return self.Response({"embedding": raw})
+
+
+class SlowOllamaClient(FakeOllamaClient):
+    """Counts /api/embed requests and holds each one open long enough to overlap"""
+
+    def __init__(self):
+        self.requests = 0
+
+    async def post(self, path, json=None, timeout=None):
+        self.requests += 1
+        await asyncio.sleep(0.05)
+        return await super().post(path, json=json, timeout=timeout)
+
+
+def test_batch_returns_the_same_results_as_single_search(monkeypatch):
+    async def fake_client():
+        return FakeOllamaClient()
+
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(ollama_service, "_get_client", fake_client)
+
+    store = NumpyVectorService()
+    for d in range(3):
+        texts = [f"document {d} talks about topic {i}" for i in range(8)]
+        asyncio.run(store.upsert_document(
+            f"doc{d}", texts, [_fake_vector(text) for text in texts], {"filename": f"doc{d}.txt"}
+        ))
+    monkeypatch.setattr(search, "vector_service", store)
+
+    client = TestClient(app)
+    queries = [
+        {"query": "topic 3", "top_k": 5},
+        {"query": "document 1", "top_k": 3, "filter": {"document_id": "doc1"}},
+        {"query": "talks about topic", "top_k": 4, "mode": "hybrid"},
+    ]
+    batch = client.post(f"{settings.API_V1_STR}/search/batch", json=queries)
+    assert batch.status_code == 200
+
+    for query, batched in zip(queries, batch.json()):
+        single = client.post(f"{settings.API_V1_STR}/search/", json=query)
+        assert single.status_code == 200
+        assert single.json()["results"] == batched["results"]
+        assert batched["results"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_one_embedding_call(monkeypatch):
+    upstream = SlowOllamaClient()
+
+    async def fake_client():
+        return upstream
+
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(ollama_service, "_get_client", fake_client)
+
+    store = NumpyVectorService()
+    texts = [f"chunk {i} about topic {i}" for i in range(8)]
+    await store.upsert_document("doc0", texts, [_fake_vector(text) for text in texts], {"filename": "doc0.txt"})
+    monkeypatch.setattr(search, "vector_service", store)
+
+    coalesced = ollama_service.get_coalescing_stats()["embedding"]["coalesced"]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(
+            client.post(f"{settings.API_V1_STR}/search/", json={"query": "topic 3", "top_k": 3})
+            for _ in range(5)
+        ))
+        assert all(response.status_code == 200 for response in responses)
+        assert upstream.requests == 1
+
+        batch = [{"query": "topic 1", "top_k": 2}, {"query": "topic 2", "top_k": 2}]
+        responses = await asyncio.gather(*(
+            client.post(f"{settings.API_V1_STR}/search/batch", json=batch) for _ in range(5)
+        ))
+        assert all(response.status_code == 200 for response in responses)
+        assert upstream.requests == 2
+
+    assert ollama_service.get_coalescing_stats()["embedding"]["coalesced"] == coalesced + 8
@@ -0,0 +1,28 @@
+"""
+Tests for single-flight coalescing of identical in-flight calls
+"""
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_upstream_call():
+    """Callers with the same key await one call; other keys run separately"""
+    flights = SingleFlight()
+    upstream_calls = []
+
+    async def fetch(value):
+        upstream_calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    results = await asyncio.gather(
+        flights.do("a", lambda: fetch(1)),
+        flights.do("a", lambda: fetch(1)),
+        flights.do("b", lambda: fetch(2)),
+    )
+
+    assert results == [2, 2, 4]
+    assert upstream_calls == [1, 2]
+    assert flights.get_stats() == {"calls": 3, "coalesced": 1, "in_flight": 0}
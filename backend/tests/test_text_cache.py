@@ -0,0 +1,45 @@
+"""
+Tests for the extracted-text cache
+"""
+import pytest
+from app.services.text_cache import ExtractedTextCache, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("  été \r\nline  \n\n\n\nend \n") == "été\nline\n\nend"
+
+
+@pytest.mark.asyncio
+async def test_extracts_once_and_invalidates_on_file_change(tmp_path):
+    cache = ExtractedTextCache(cache_dir=str(tmp_path / "text_cache"))
+    upload = tmp_path / "doc1.txt"
+    upload.write_text("first version\r\n")
+
+    assert await cache.get_text("doc1", str(upload), "txt") == "first version"
+    assert await cache.get_text("doc1", str(upload), "txt") == "first version"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    upload.write_text("second version")
+    assert await cache.get_text("doc1", str(upload), "txt") == "second version"
+    assert cache.misses == 2
+    assert len(list(cache.cache_dir.glob("doc1.*"))) == 1  # Stale entry replaced
+
+    await cache.delete("doc1")
+    assert not list(cache.cache_dir.glob("doc1.*"))
+
+
+@pytest.mark.asyncio
+async def test_stored_content_hash_skips_hashing_the_file(tmp_path, monkeypatch):
+    from app.services import text_cache as text_cache_module
+
+    cache = ExtractedTextCache(cache_dir=str(tmp_path / "text_cache"))
+    upload = tmp_path / "doc1.txt"
+    upload.write_text("some text")
+    await cache.get_text("doc1", str(upload), "txt", content_hash="abc123")
+
+    def no_hashing(file_path):
+        raise AssertionError("file was re-hashed")
+
+    monkeypatch.setattr(text_cache_module, "hash_file", no_hashing)
+    assert await cache.get_text("doc1", str(upload), "txt", content_hash="abc123") == "some text"
+    assert cache.hits == 1
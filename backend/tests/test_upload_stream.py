@@ -0,0 +1,142 @@
+"""
+Tests for streaming uploads to disk
+"""
+import hashlib
+import io
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.core.config import settings
+from app.services.document_service import (
+    DocumentService,
+    MalformedUploadError,
+    MultipartFileReader,
+    UploadTooLargeError
+)
+
+BOUNDARY = "test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+class FakeUpload:
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+        self.reads = []
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = self._stream.read(size)
+        self.reads.append(len(chunk))
+        return chunk
+
+
+@pytest.mark.asyncio
+async def test_streams_in_chunks_and_hashes(tmp_path):
+    data = b"x" * 2500
+    upload = FakeUpload(data)
+    destination = tmp_path / "doc.txt"
+
+    size, content_hash = await DocumentService.save_upload(upload, destination, max_size=10_000, chunk_size=1000)
+
+    assert size == 2500
+    assert content_hash == hashlib.sha256(data).hexdigest()
+    assert destination.read_bytes() == data
+    assert max(upload.reads) == 1000
+    assert [p.name for p in tmp_path.iterdir()] == ["doc.txt"]
+
+
+@pytest.mark.asyncio
+async def test_rejects_oversized_upload_mid_stream(tmp_path):
+    upload = FakeUpload(b"x" * 5000)
+    destination = tmp_path / "doc.txt"
+
+    with pytest.raises(UploadTooLargeError):
+        await DocumentService.save_upload(upload, destination, max_size=2500, chunk_size=1000)
+
+    assert sum(upload.reads) == 3000  # Stopped at the first chunk over the limit
+    assert not list(tmp_path.iterdir())
+
+
+def multipart_body(filename: str, data: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="note"\r\n\r\n'
+        "hello\r\n"
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class BodyStream:
+    """A request body arriving in small pieces, counting the pieces pulled"""
+
+    def __init__(self, body: bytes, piece: int = 100):
+        self.pieces = [body[i:i + piece] for i in range(0, len(body), piece)]
+        self.pulled = 0
+
+    async def __aiter__(self):
+        for piece in self.pieces:
+            self.pulled += 1
+            yield piece
+
+
+@pytest.mark.asyncio
+async def test_multipart_reader_streams_the_file_part(tmp_path):
+    data = bytes(range(256)) * 20
+    body = BodyStream(multipart_body("notes.txt", data), piece=7)
+    reader = MultipartFileReader(CONTENT_TYPE, body)
+
+    assert await reader.start() == "notes.txt"
+    size, content_hash = await DocumentService.save_upload(
+        reader, tmp_path / "doc.txt", max_size=10_000, chunk_size=1000
+    )
+
+    assert (tmp_path / "doc.txt").read_bytes() == data
+    assert (size, content_hash) == (len(data), hashlib.sha256(data).hexdigest())
+
+
+@pytest.mark.asyncio
+async def test_multipart_reader_stops_pulling_the_body_past_the_limit(tmp_path):
+    body = BodyStream(multipart_body("big.txt", b"x" * 50_000))
+    reader = MultipartFileReader(CONTENT_TYPE, body)
+    await reader.start()
+
+    with pytest.raises(UploadTooLargeError):
+        await DocumentService.save_upload(reader, tmp_path / "doc.txt", max_size=2500, chunk_size=1000)
+
+    assert body.pulled < 40  # of ~500 pieces
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_multipart_reader_rejects_bodies_without_the_file():
+    with pytest.raises(MalformedUploadError):
+        MultipartFileReader("application/json", BodyStream(b"{}"))
+
+    body = multipart_body("notes.txt", b"data").replace(b'name="file"', b'name="other"')
+    with pytest.raises(MalformedUploadError):
+        await MultipartFileReader(CONTENT_TYPE, BodyStream(body)).start()
+
+
+def test_upload_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 5000)
+    client = TestClient(app)
+    url = f"{settings.API_V1_STR}/documents/upload"
+
+    response = client.post(url, files={"file": ("notes.txt", b"some text", "text/plain")})
+    assert response.status_code == 201
+    assert response.json()["filename"] == "notes.txt"
+    assert (tmp_path / f"{response.json()['document_id']}.txt").read_bytes() == b"some text"
+
+    # Refused from Content-Length before any of the body is read
+    response = client.post(url, files={"file": ("big.txt", b"x" * 50_000, "text/plain")})
+    assert response.status_code == 413
+
+    # Within the Content-Length allowance, refused while streaming
+    response = client.post(url, files={"file": ("big.txt", b"x" * 6000, "text/plain")})
+    assert response.status_code == 413
+
+    response = client.post(url, files={"file": ("notes.exe", b"data", "text/plain")})
+    assert response.status_code == 400
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".txt"]
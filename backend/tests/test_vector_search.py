@@ -0,0 +1,195 @@
+"""
+Tests for vector search predicates pushed down into Lance
+"""
+import random
+import pytest
+from app.core.config import settings
+from app.services.chroma_service import VectorService, build_where
+from app.services.vector_backend import reciprocal_rank_fusion, score_to_distance
+
+
+def test_build_where_combines_filter_and_exclusions():
+    assert build_where() is None
+    assert build_where({"document_id": "a"}) == "document_id = 'a'"
+    assert build_where(exclude={"document_id": ["a", "o'b"]}) == "document_id NOT IN ('a', 'o''b')"
+    assert build_where({"filename": "x.txt"}, {"document_id": "a"}) == (
+        "filename = 'x.txt' AND document_id != 'a'"
+    )
+    # Unknown columns are ignored rather than sent to Lance
+    assert build_where({"nope": "a"}) is None
+
+
+@pytest.mark.asyncio
+async def test_search_excludes_documents_and_applies_distance_cutoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    service = VectorService()
+    rng = random.Random(0)
+    for d in range(4):
+        await service.upsert_document(
+            f"doc{d}",
+            [f"chunk {d}-{i}" for i in range(10)],
+            [[rng.random() for _ in range(8)] for _ in range(10)],
+            {"filename": f"doc{d}.txt"}
+        )
+    query = [rng.random() for _ in range(8)]
+
+    results = await service.search(query, top_k=5, exclude={"document_id": ["doc0", "doc1"]})
+    assert len(results) == 5
+    assert {r["metadata"]["document_id"] for r in results} <= {"doc2", "doc3"}
+
+    max_distance = score_to_distance(0.7)
+    results = await service.search(query, top_k=40, max_distance=max_distance)
+    assert len(results) < 40
+    assert all(r["score"] >= 0.7 - 1e-6 for r in results)
+    service.close()
+
+
+@pytest.mark.asyncio
+async def test_reupsert_replaces_chunks_and_compaction_keeps_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    service = VectorService()
+    rng = random.Random(1)
+    for n in (10, 10, 4):
+        await service.upsert_document(
+            "doc",
+            [f"v{n} chunk {i}" for i in range(n)],
+            [[rng.random() for _ in range(8)] for _ in range(n)],
+            {"filename": "doc.txt"}
+        )
+
+    chunks = await service.get_document_chunks("doc")
+    assert [c["metadata"]["text"] for c in chunks] == [f"v4 chunk {i}" for i in range(4)]
+
+    storage = await service.maybe_compact(force=True)
+    assert storage["last_compaction"] is not None
+    assert storage["num_fragments"] == 1
+    assert (await service.get_stats())["total_vectors"] == 4
+    service.close()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    def hits(*ids):
+        return [{"id": i, "metadata": {"text": i}} for i in ids]
+
+    fused = reciprocal_rank_fusion([hits("a", "b", "c"), hits("c", "d", "a")], top_k=3, k=60)
+    assert [r["id"] for r in fused] == ["a", "c", "b"]
+    assert fused[0]["ranks"] == [1, 3]
+    assert 0 < fused[-1]["score"] < fused[0]["score"] <= 1
+
+
+@pytest.mark.asyncio
+async def test_keyword_and_hybrid_search_find_exact_terms(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    service = VectorService()
+    rng = random.Random(2)
+    texts = [f"generic filler sentence {i}" for i in range(19)] + ["the senator quoted 47 percent"]
+    await service.upsert_document(
+        "doc", texts, [[rng.random() for _ in range(8)] for _ in texts], {"filename": "doc.txt"}
+    )
+
+    keyword = await service.keyword_search("senator", top_k=3)
+    assert keyword[0]["metadata"]["text"] == "the senator quoted 47 percent"
+    assert keyword[0]["score"] == 1.0
+
+    hybrid = await service.hybrid_search("senator", [rng.random() for _ in range(8)], top_k=5)
+    assert len(hybrid) == 5
+    assert "the senator quoted 47 percent" in [r["metadata"]["text"] for r in hybrid]
+
+    latency = (await service.get_stats())["search_latency_ms"]
+    assert latency["keyword"]["count"] == 1 and latency["hybrid"]["count"] == 1
+    service.close()
+
+
+@pytest.mark.asyncio
+async def test_float16_truncated_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "VECTOR_STORAGE_PRECISION", "float16")
+    monkeypatch.setattr(settings, "VECTOR_STORAGE_DIM", 4)
+    service = VectorService()
+    rng = random.Random(3)
+    vectors = [[rng.random() for _ in range(8)] for _ in range(6)]
+    await service.upsert_document("doc", [f"chunk {i}" for i in range(6)], vectors, {"filename": "doc.txt"})
+
+    fmt = (await service.get_stats())["vector_format"]
+    assert fmt["dim"] == 4 and fmt["type"] == "halffloat"
+    assert fmt["raw_vector_bytes"] == 6 * 4 * 2
+
+    # Full-size query vectors are truncated the same way as stored ones
+    results = await service.search(vectors[2], top_k=1)
+    assert results[0]["metadata"]["chunk_index"] == 2
+    service.close()
+
+
+@pytest.mark.asyncio
+async def test_search_many_matches_single_searches_in_input_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    service = VectorService()
+    rng = random.Random(4)
+    vectors = [[rng.random() for _ in range(8)] for _ in range(30)]
+    await service.upsert_document("doc", [f"chunk {i}" for i in range(30)], vectors, {"filename": "doc.txt"})
+
+    queries = [vectors[7], vectors[0], vectors[21]]
+    batched = await service.search_many(queries, top_k=3)
+    singles = [await service.search(q, top_k=3) for q in queries]
+
+    assert [[r["id"] for r in rs] for rs in batched] == [[r["id"] for r in rs] for rs in singles]
+    assert [rs[0]["metadata"]["chunk_index"] for rs in batched] == [7, 0, 21]
+    service.close()
+
+
+@pytest.mark.asyncio
+async def test_chunk_offsets_are_stored_and_added_to_older_tables(tmp_path, monkeypatch):
+    import lancedb
+    import pyarrow as pa
+
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    # A table created before the offset columns existed
+    legacy = lancedb.connect(str(tmp_path)).create_table(VectorService().table_name, schema=pa.schema([
+        pa.field("id", pa.string()),
+        pa.field("text", pa.string()),
+        pa.field("document_id", pa.string()),
+        pa.field("filename", pa.string()),
+        pa.field("chunk_index", pa.int32()),
+        pa.field("vector", pa.list_(pa.float32(), 4)),
+    ]))
+    legacy.add(pa.table({
+        "id": ["old_chunk_0"], "text": ["old"], "document_id": ["old"], "filename": ["old.txt"],
+        "chunk_index": pa.array([0], pa.int32()),
+        "vector": pa.FixedSizeListArray.from_arrays(pa.array([0.5] * 4, pa.float32()), 4),
+    }))
+
+    service = VectorService()
+    await service.upsert_document(
+        "doc", ["First one.", "Second one."], [[1.0, 0, 0, 0], [0, 1.0, 0, 0]],
+        {"filename": "doc.txt"}, chunk_offsets=[(0, 10), (11, 22)]
+    )
+
+    results = await service.search([0, 1.0, 0, 0], top_k=3)
+    assert (results[0]["metadata"]["start_offset"], results[0]["metadata"]["end_offset"]) == (11, 22)
+    old = (await service.get_document_chunks("old"))[0]["metadata"]
+    assert old["start_offset"] is None and old["end_offset"] is None
+    service.close()
+
+
+@pytest.mark.asyncio
+async def test_table_version_is_unique_across_resets(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "VECTOR_STORAGE_DIM", None)
+    service = VectorService()
+    # reset() recreates the table at the default dimension
+    vector = [1.0] + [0.0] * (service.default_embedding_dim - 1)
+    await service.upsert_document("doc", ["one"], [vector], {"filename": "doc.txt"})
+    before = await service.get_table_version()
+
+    # A new instance reads the same identity back from the table
+    reopened = VectorService()
+    assert await reopened.get_table_version() == before
+    reopened.close()
+
+    # Same Lance version number after a reset, different token
+    await service.reset()
+    await service.upsert_document("doc", ["one"], [vector], {"filename": "doc.txt"})
+    after = await service.get_table_version()
+    assert after != before
+    assert after.rsplit("-", 1)[1] == before.rsplit("-", 1)[1]
+    service.close()